@@ -1,61 +1,46 @@
-from datetime import datetime
 import uuid
 from fastapi import APIRouter, Depends, HTTPException, status, Request
-from fastapi.responses import JSONResponse
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..services import UserService, TenantService
+from ..services import UserService
 from ..utils.auth_utils import (
     create_access_token,
     create_refresh_token,
     verify_access_token,
     oauth2_scheme,
-    blacklisted_tokens,
+    revoke_token,
 )
 from ..schemas.users import LoginSchema, RegisterSchema, UserCreate, UserSchema
 from ..schemas.auth_token import RefreshTokenResponse
 from ..utils.session import get_db
+from ..utils.responses import PydanticJSONResponse
 from ..schemas import StandardResponse
 
 authRouter = APIRouter(prefix="/auth", tags=["Auth"])
 
 
 @authRouter.post("/register", response_model=StandardResponse[RegisterSchema])
-async def create_user(user: UserCreate, db: Session = Depends(get_db)):
+async def create_user(user: UserCreate, db: AsyncSession = Depends(get_db)):
     """
     Endpoint to create a new user account if the email doesn't already exist
     """
-    existing_user = UserService.get_user_by_email(db, user.email)
-
-    if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail="User already exists.",
-        )
-
-    tenant_data = {
-        "name": f"Default-{uuid.uuid4()}",
-        "description": "Default organisation",
-        "owner": None,
-    }
-    # create tenant
-    new_tenant = await TenantService.create_tenant(db, tenant_data)
-
-    # Create the new user
-    new_user = await UserService.create_user(db, user, new_tenant.id)
-    new_tenant.update(owner=new_user.id)
-    new_tenant.save(db)
+    new_user, _ = await UserService.register(
+        db,
+        user,
+        tenant_name=f"Default-{uuid.uuid4()}",
+        tenant_description="Default organisation",
+    )
 
-    access_token = create_access_token(data={"sub": user.email})
+    access_token = create_access_token(data=UserService.principal_claims(new_user))
     refresh_token = create_refresh_token(data={"sub": user.email})
 
     user_schema = UserSchema.model_validate(new_user)
 
-    return JSONResponse(
+    return PydanticJSONResponse(
         {
             "data": {
-                "user": user_schema.model_dump(),
+                "user": user_schema,
                 "tokens": {
                     "access_token": access_token,
                     "refresh_token": refresh_token,
@@ -71,9 +56,11 @@ async def create_user(user: UserCreate, db: Session = Depends(get_db)):
 async def login_user(
     request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    user = UserService.authenticate_user(db, form_data.username, form_data.password)
+    user = await UserService.authenticate_user(
+        db, form_data.username, form_data.password
+    )
     if not user:
         raise HTTPException(
             status_code=401,
@@ -82,13 +69,13 @@ async def login_user(
         )
     user_schema = UserSchema.model_validate(user)
 
-    access_token = create_access_token(data={"sub": user.email})
+    access_token = create_access_token(data=UserService.principal_claims(user))
     refresh_token = create_refresh_token(data={"sub": user.email})
 
-    return JSONResponse(
+    return PydanticJSONResponse(
         content={
             "data": {
-                "user": user_schema.model_dump(),
+                "user": user_schema,
                 "tokens": {
                     "access_token": access_token,
                     "refresh_token": refresh_token,
@@ -101,7 +88,7 @@ async def login_user(
 
 
 @authRouter.get("/refresh", response_model=StandardResponse[RefreshTokenResponse])
-def refresh_token(refresh_token: str, db: Session = Depends(get_db)):
+async def refresh_token(refresh_token: str, db: AsyncSession = Depends(get_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail={
@@ -111,9 +98,12 @@ def refresh_token(refresh_token: str, db: Session = Depends(get_db)):
         headers={"WWW-Authenticate": "Bearer"},
     )
     email = verify_access_token(refresh_token, credentials_exception)
-    new_access_token = create_access_token(data={"sub": email})
+    user = await UserService.get_user_by_email(db, email)
+    if user is None:
+        raise credentials_exception
+    new_access_token = create_access_token(data=UserService.principal_claims(user))
 
-    return JSONResponse(
+    return PydanticJSONResponse(
         content={
             "data": {"access_token": new_access_token},
             "message": "Token refreshed successfully",
@@ -130,9 +120,14 @@ def refresh_token(refresh_token: str, db: Session = Depends(get_db)):
 )
 async def logout(token: str = Depends(oauth2_scheme)):
     """
-    Revoke the token by blacklisting it.
+    Revoke the token until it expires.
     """
-    blacklisted_tokens[token] = datetime.now()
-    return JSONResponse(
+    if not await revoke_token(token):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return PydanticJSONResponse(
         content={"data": None, "status": "success"}, status_code=status.HTTP_200_OK
     )
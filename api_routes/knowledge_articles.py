@@ -1,31 +1,78 @@
-from typing import List
-from fastapi import APIRouter, Depends, status, HTTPException
-from fastapi.responses import JSONResponse
-from sqlalchemy.orm import session
+from datetime import datetime
+from typing import List, Optional, Union
+from fastapi import APIRouter, Depends, Query, Request, status, HTTPException
+from fastapi.responses import StreamingResponse
 
 from ..services import (
     get_current_user_dep,
     check_user_permission,
     Actions,
     ArticleService,
+    RevisionService,
 )
+from ..services.knowledge_articles import ARTICLE_INCLUDES, serialize_article
 from ..schemas import (
     StandardResponse,
+    PaginatedResponse,
     ArticleCreateSchema,
     ArticleSchema,
+    ArticleSummarySchema,
+    ArticleExpandedSchema,
+    ArticleSummaryExpandedSchema,
     ArticleUpdateSchema,
+    ArticleBulkUpdateSchema,
+    ArticleBulkDeleteSchema,
+    BulkItemResult,
+    ArticleRevisionSummarySchema,
+    ArticleRevisionSchema,
+    ArticleRevisionDiffSchema,
 )
-from ..models import Users
+from ..schemas.users import PrincipalSchema
+from ..models import ArticleStatus
 from ..utils import session
+from ..utils.responses import PydanticJSONResponse
+from ..utils.http_cache import (
+    cache_headers,
+    has_conditional_headers,
+    is_not_modified,
+    make_etag,
+    not_modified_response,
+)
+from ..utils.streaming import gzip_stream, ndjson_chunk
+from ..database import SessionLocal
+from .. import settings
 
 articlesRouter = APIRouter(prefix="/knowledge-articles", tags=["Knowledge Articles"])
 
 
+def _article_cache_control(article_status: ArticleStatus) -> str:
+    # Published articles rarely change; drafts must always be revalidated
+    if article_status == ArticleStatus.PUBLISHED:
+        return f"private, max-age={settings.published_article_max_age_seconds}"
+    return "private, no-cache"
+
+
+def _etag_parts(article, includes: List[str]) -> list:
+    # The article's version plus every expanded field in the representation,
+    # so renaming the author or tenant changes the ETag too
+    parts = [article.id, article.updated_at.isoformat()]
+    if "author" in includes:
+        parts += ["author", article.author.email, article.author.name]
+    if "tenant" in includes:
+        parts += ["tenant", article.tenant.name]
+    return parts
+
+
+def _last_modified(article, includes: List[str]) -> Optional[datetime]:
+    # Expanded fields change without touching the article's updated_at
+    return None if includes else article.updated_at
+
+
 @articlesRouter.post("/", response_model=StandardResponse[ArticleSchema])
 async def create_article(
     article: ArticleCreateSchema,
     db=Depends(session.get_db),
-    current_user: Users = Depends(get_current_user_dep),
+    current_user: PrincipalSchema = Depends(get_current_user_dep),
 ):
     """Creates a new article resource"""
     permitted = await check_user_permission(
@@ -39,21 +86,162 @@ async def create_article(
             detail="You do not have the right permissions",
         )
 
-    result = ArticleService.create_article(db=db, article=article)
+    result = await ArticleService.create_article(db=db, article=article)
 
     new_article = ArticleSchema.model_validate(result)
 
-    return JSONResponse(
-        {"data": new_article.model_dump(), "status": "success"},
+    return PydanticJSONResponse(
+        {"data": new_article, "status": "success"},
         status_code=status.HTTP_201_CREATED,
     )
 
 
-@articlesRouter.get("/", response_model=StandardResponse[List[ArticleSchema]])
+def _parse_include(include: Optional[str]) -> List[str]:
+    requested = [name.strip() for name in (include or "").split(",") if name.strip()]
+    unknown = set(requested) - set(ARTICLE_INCLUDES)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown include: {', '.join(sorted(unknown))}. "
+            f"Supported: {', '.join(ARTICLE_INCLUDES)}.",
+        )
+    return requested
+
+
+def _check_bulk_size(items: list):
+    if not items:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No items provided.",
+        )
+    if len(items) > settings.article_bulk_max_items:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.article_bulk_max_items} items per request.",
+        )
+
+
+@articlesRouter.post("/bulk", response_model=StandardResponse[List[BulkItemResult]])
+async def bulk_create_articles(
+    articles: List[ArticleCreateSchema],
+    db=Depends(session.get_db),
+    current_user: PrincipalSchema = Depends(get_current_user_dep),
+):
+    """Creates many article resources in one transaction"""
+    _check_bulk_size(articles)
+    permitted = await check_user_permission(
+        user_id=str(current_user.id),
+        action=Actions.CREATE.value,
+        tenant_id=str(current_user.active_workspace),
+    )
+    if not permitted:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You do not have the right permissions",
+        )
+
+    results = await ArticleService.bulk_create_articles(
+        db=db, tenant_id=str(current_user.active_workspace), articles=articles
+    )
+
+    return PydanticJSONResponse(
+        {"data": results, "status": "success"},
+        status_code=status.HTTP_200_OK,
+    )
+
+
+@articlesRouter.patch("/bulk", response_model=StandardResponse[List[BulkItemResult]])
+async def bulk_update_articles(
+    updates: List[ArticleBulkUpdateSchema],
+    db=Depends(session.get_db),
+    current_user: PrincipalSchema = Depends(get_current_user_dep),
+):
+    """Updates many knowledge resources in one transaction"""
+    _check_bulk_size(updates)
+    permitted = await check_user_permission(
+        user_id=str(current_user.id),
+        action=Actions.UPDATE.value,
+        tenant_id=str(current_user.active_workspace),
+    )
+    if not permitted:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You are not allowed to update this resources",
+        )
+
+    results = await ArticleService.bulk_update_articles(
+        db=db,
+        tenant_id=str(current_user.active_workspace),
+        updates=updates,
+        author_id=current_user.id,
+    )
+
+    return PydanticJSONResponse(
+        {"data": results, "status": "success"},
+        status_code=status.HTTP_200_OK,
+    )
+
+
+@articlesRouter.post(
+    "/bulk/delete", response_model=StandardResponse[List[BulkItemResult]]
+)
+async def bulk_delete_articles(
+    payload: ArticleBulkDeleteSchema,
+    db=Depends(session.get_db),
+    current_user: PrincipalSchema = Depends(get_current_user_dep),
+):
+    """Deletes many knowledge resources in one statement"""
+    _check_bulk_size(payload.ids)
+    permitted = await check_user_permission(
+        user_id=str(current_user.id),
+        action=Actions.DELETE.value,
+        tenant_id=str(current_user.active_workspace),
+    )
+    if not permitted:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You are not allowed to delete this resource",
+        )
+
+    results = await ArticleService.bulk_delete_articles(
+        db=db, tenant_id=str(current_user.active_workspace), article_ids=payload.ids
+    )
+
+    return PydanticJSONResponse(
+        {"data": results, "status": "success"},
+        status_code=status.HTTP_200_OK,
+    )
+
+
+@articlesRouter.get(
+    "/",
+    response_model=PaginatedResponse[
+        Union[
+            List[ArticleExpandedSchema],
+            List[ArticleSummaryExpandedSchema],
+            List[ArticleSchema],
+            List[ArticleSummarySchema],
+        ]
+    ],
+)
 async def fetch_tenant_articles(
-    db=Depends(session.get_db), current_user: Users = Depends(get_current_user_dep)
+    request: Request,
+    limit: int = Query(
+        settings.article_page_size, ge=1, le=settings.article_page_size_max
+    ),
+    cursor: Optional[str] = None,
+    article_status: Optional[ArticleStatus] = Query(None, alias="status"),
+    tag: Optional[str] = None,
+    author_id: Optional[str] = None,
+    include_content: bool = True,
+    include: Optional[str] = Query(
+        None, description="Comma-separated relationships to expand: author, tenant"
+    ),
+    db=Depends(session.get_db),
+    current_user: PrincipalSchema = Depends(get_current_user_dep),
 ):
-    """Fetch all knowledge resources in a tenant"""
+    """Fetch a page of knowledge resources in a tenant"""
+    includes = _parse_include(include)
     permitted = await check_user_permission(
         user_id=str(current_user.id),
         action=Actions.READ.value,
@@ -64,28 +252,156 @@ async def fetch_tenant_articles(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You are not allowed to view this resources",
         )
-    data = ArticleService.retrieve_tenant_articles(
-        db=db, tenant_id=str(current_user.active_workspace)
+
+    tenant_id = str(current_user.active_workspace)
+    data, next_cursor = await ArticleService.retrieve_tenant_articles(
+        db=db,
+        tenant_id=tenant_id,
+        limit=limit,
+        cursor=cursor,
+        article_status=article_status,
+        tag=tag,
+        author_id=author_id,
+        include_content=include_content,
+        include=includes,
+    )
+
+    # Validate the page itself: any create, update or delete that changes it
+    # changes some (id, updated_at) or the next cursor, without a tenant-wide
+    # aggregate. There is no Last-Modified, as a delete can leave the page's
+    # newest update older.
+    headers = cache_headers(
+        etag=make_etag(
+            tenant_id,
+            request.url.query,
+            next_cursor,
+            *(part for article in data for part in _etag_parts(article, includes)),
+        ),
+        last_modified=None,
+        cache_control="private, no-cache",
+    )
+    if is_not_modified(request, headers["ETag"], None):
+        return not_modified_response(headers)
+
+    article_arr = [
+        serialize_article(article, include_content, includes) for article in data
+    ]
+
+    return PydanticJSONResponse(
+        {"data": article_arr, "next_cursor": next_cursor, "status": "success"},
+        status_code=status.HTTP_200_OK,
+        headers=headers,
     )
 
-    articles = [ArticleSchema.model_validate(article) for article in data]
-    article_arr = [article.model_dump() for article in articles]
 
-    return JSONResponse(
+@articlesRouter.get(
+    "/search",
+    response_model=StandardResponse[
+        Union[List[ArticleSchema], List[ArticleSummarySchema]]
+    ],
+)
+async def search_tenant_articles(
+    q: Optional[str] = None,
+    tag: List[str] = Query([]),
+    limit: int = Query(
+        settings.article_page_size, ge=1, le=settings.article_page_size_max
+    ),
+    offset: int = Query(0, ge=0),
+    include_content: bool = False,
+    db=Depends(session.get_db),
+    current_user: PrincipalSchema = Depends(get_current_user_dep),
+):
+    """Search knowledge resources in a tenant by text and tags"""
+    if not q and not tag:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide a search query or at least one tag.",
+        )
+
+    permitted = await check_user_permission(
+        user_id=str(current_user.id),
+        action=Actions.READ.value,
+        tenant_id=str(current_user.active_workspace),
+    )
+    if not permitted:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You are not allowed to view this resources",
+        )
+
+    data = await ArticleService.search_articles(
+        db=db,
+        tenant_id=str(current_user.active_workspace),
+        limit=limit,
+        offset=offset,
+        text=q,
+        tags=tag,
+        include_content=include_content,
+    )
+
+    schema = ArticleSchema if include_content else ArticleSummarySchema
+    article_arr = [schema.model_validate(article) for article in data]
+
+    return PydanticJSONResponse(
         {"data": article_arr, "status": "success"},
         status_code=status.HTTP_200_OK,
     )
 
 
+@articlesRouter.get("/export", response_class=StreamingResponse)
+async def export_tenant_articles(
+    compress: bool = False,
+    include_content: bool = True,
+    current_user: PrincipalSchema = Depends(get_current_user_dep),
+):
+    """Stream every knowledge resource in a tenant as NDJSON"""
+    permitted = await check_user_permission(
+        user_id=str(current_user.id),
+        action=Actions.READ.value,
+        tenant_id=str(current_user.active_workspace),
+    )
+    if not permitted:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You are not allowed to view this resources",
+        )
+
+    tenant_id = str(current_user.active_workspace)
+    schema = ArticleSchema if include_content else ArticleSummarySchema
+
+    async def ndjson_rows():
+        # The request-scoped session is closed before the body is streamed,
+        # so the export holds its own session for the lifetime of the stream.
+        async with SessionLocal() as db:
+            async for batch in ArticleService.stream_tenant_articles(
+                db=db, tenant_id=tenant_id, include_content=include_content
+            ):
+                yield ndjson_chunk(schema.model_validate(article) for article in batch)
+
+    headers = {"Content-Disposition": 'attachment; filename="articles.ndjson"'}
+    body = ndjson_rows()
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+        body = gzip_stream(body)
+
+    return StreamingResponse(body, media_type="application/x-ndjson", headers=headers)
+
+
 @articlesRouter.get(
-    "/{article_id}", response_model=StandardResponse[ArticleCreateSchema]
+    "/{article_id}",
+    response_model=StandardResponse[Union[ArticleExpandedSchema, ArticleSchema]],
 )
 async def fetch_article_by_id(
+    request: Request,
     article_id: str,
+    include: Optional[str] = Query(
+        None, description="Comma-separated relationships to expand: author, tenant"
+    ),
     db=Depends(session.get_db),
-    current_user: Users = Depends(get_current_user_dep),
+    current_user: PrincipalSchema = Depends(get_current_user_dep),
 ):
     """Fetch knowledge resource by ID"""
+    includes = _parse_include(include)
     permitted = await check_user_permission(
         user_id=str(
             current_user.id,
@@ -99,19 +415,152 @@ async def fetch_article_by_id(
             detail="You are not allowed to view this resource",
         )
 
-    data = ArticleService.get_article_by_id(
-        db=db, tenant_id=current_user.active_workspace, article_id=article_id
+    if has_conditional_headers(request):
+        # Revalidate against the version columns without loading the content
+        version = await ArticleService.get_article_version(
+            db=db,
+            tenant_id=current_user.active_workspace,
+            article_id=article_id,
+            include=includes,
+        )
+        if version:
+            headers = cache_headers(
+                etag=make_etag(*_etag_parts(version, includes)),
+                last_modified=_last_modified(version, includes),
+                cache_control=_article_cache_control(version.status),
+            )
+            if is_not_modified(
+                request, headers["ETag"], _last_modified(version, includes)
+            ):
+                return not_modified_response(headers)
+
+    article = await ArticleService.get_article_by_id(
+        db=db,
+        tenant_id=current_user.active_workspace,
+        article_id=article_id,
+        include=includes,
     )
 
-    if not data:
+    if not article:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Article '{article_id}' not found",
         )
 
-    article = ArticleSchema.model_validate(data)
-    return JSONResponse(
-        {"data": article.model_dump(), "status": "success"},
+    return PydanticJSONResponse(
+        {"data": article, "status": "success"},
+        status_code=status.HTTP_200_OK,
+        headers=cache_headers(
+            etag=make_etag(*_etag_parts(article, includes)),
+            last_modified=_last_modified(article, includes),
+            cache_control=_article_cache_control(article.status),
+        ),
+    )
+
+
+async def _check_read_permission(current_user: PrincipalSchema):
+    permitted = await check_user_permission(
+        user_id=str(current_user.id),
+        action=Actions.READ.value,
+        tenant_id=str(current_user.active_workspace),
+    )
+    if not permitted:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You are not allowed to view this resource",
+        )
+
+
+@articlesRouter.get(
+    "/{article_id}/revisions",
+    response_model=StandardResponse[List[ArticleRevisionSummarySchema]],
+)
+async def list_article_revisions(
+    article_id: str,
+    limit: int = Query(
+        settings.article_page_size, ge=1, le=settings.article_page_size_max
+    ),
+    before: Optional[int] = Query(None, ge=1, description="Revisions older than"),
+    db=Depends(session.get_db),
+    current_user: PrincipalSchema = Depends(get_current_user_dep),
+):
+    """List an article's revisions, newest first, without their content"""
+    await _check_read_permission(current_user)
+
+    revisions = await RevisionService.list_revisions(
+        db=db,
+        tenant_id=current_user.active_workspace,
+        article_id=article_id,
+        limit=limit,
+        before=before,
+    )
+    data = [ArticleRevisionSummarySchema.model_validate(r) for r in revisions]
+    return PydanticJSONResponse(
+        {"data": data, "status": "success"},
+        status_code=status.HTTP_200_OK,
+    )
+
+
+@articlesRouter.get(
+    "/{article_id}/revisions/{revision}",
+    response_model=StandardResponse[ArticleRevisionSchema],
+)
+async def fetch_article_revision(
+    article_id: str,
+    revision: int,
+    db=Depends(session.get_db),
+    current_user: PrincipalSchema = Depends(get_current_user_dep),
+):
+    """Fetch one revision of an article, content included"""
+    await _check_read_permission(current_user)
+
+    data = await RevisionService.get_revision(
+        db=db,
+        tenant_id=current_user.active_workspace,
+        article_id=article_id,
+        revision=revision,
+    )
+    if not data:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Revision {revision} of article '{article_id}' not found",
+        )
+
+    return PydanticJSONResponse(
+        {"data": data, "status": "success"},
+        status_code=status.HTTP_200_OK,
+    )
+
+
+@articlesRouter.get(
+    "/{article_id}/diff",
+    response_model=StandardResponse[ArticleRevisionDiffSchema],
+)
+async def diff_article_revisions(
+    article_id: str,
+    from_revision: int = Query(..., ge=1, alias="from"),
+    to_revision: int = Query(..., ge=1, alias="to"),
+    db=Depends(session.get_db),
+    current_user: PrincipalSchema = Depends(get_current_user_dep),
+):
+    """Unified diff of the content of two revisions of an article"""
+    await _check_read_permission(current_user)
+
+    data = await RevisionService.diff_revisions(
+        db=db,
+        tenant_id=current_user.active_workspace,
+        article_id=article_id,
+        from_revision=from_revision,
+        to_revision=to_revision,
+    )
+    if not data:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Revisions of article '{article_id}' not found",
+        )
+
+    return PydanticJSONResponse(
+        {"data": data, "status": "success"},
         status_code=status.HTTP_200_OK,
     )
 
@@ -123,7 +572,7 @@ async def update_by_id(
     article_id: str,
     update_obj: ArticleUpdateSchema,
     db=Depends(session.get_db),
-    current_user: Users = Depends(get_current_user_dep),
+    current_user: PrincipalSchema = Depends(get_current_user_dep),
 ):
     """Fetch knowledge resource by ID"""
     permitted = await check_user_permission(
@@ -137,13 +586,14 @@ async def update_by_id(
             detail="You are not allowed to update this resources",
         )
 
-    ArticleService.update_article(
+    await ArticleService.update_article(
         db=db,
         tenant_id=current_user.active_workspace,
         article_id=article_id,
         update_obj=update_obj,
+        author_id=current_user.id,
     )
-    return JSONResponse(
+    return PydanticJSONResponse(
         {"data": None, "status": "success"},
         status_code=status.HTTP_200_OK,
     )
@@ -155,7 +605,7 @@ async def update_by_id(
 async def delete_by_id(
     article_id: str,
     db=Depends(session.get_db),
-    current_user: Users = Depends(get_current_user_dep),
+    current_user: PrincipalSchema = Depends(get_current_user_dep),
 ):
     """Fetch knowledge resource by ID"""
     permitted = await check_user_permission(
@@ -169,13 +619,13 @@ async def delete_by_id(
             detail="You are not allowed to delete this resource",
         )
 
-    ArticleService.delete_article(
+    await ArticleService.delete_article(
         db=db,
         tenant_id=current_user.active_workspace,
         article_id=article_id,
     )
 
-    return JSONResponse(
+    return PydanticJSONResponse(
         {"data": None, "status": "success"},
         status_code=status.HTTP_200_OK,
     )
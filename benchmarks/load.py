@@ -0,0 +1,337 @@
+"""Load-test the API in main.py with reproducible scenarios.
+
+Seeds the dataset from benchmarks.seed (same --seed, same data), then drives
+the real app, lifespan included, in-process through httpx with --concurrency
+clients per scenario:
+
+    login   bursts of --concurrency simultaneous logins (password hashing)
+    list    first page of the caller's tenant articles
+    fetch   single articles of the caller's tenant by id
+    mixed   90% list/fetch, 10% creates and edits (--write-ratio)
+
+Callers are picked with a seeded RNG. For each scenario it reports
+throughput, p50/p95/p99 latency and errors; with --allocations it repeats a
+shorter pass under tracemalloc and reports peak traced memory and the memory
+still held afterwards per request (tracing slows requests down, so those
+passes are not timed).
+
+--output writes the results as JSON; --baseline compares against an earlier
+file and exits non-zero when throughput or p95 regress by more than
+--tolerance, e.g. between two dependency versions on the same machine.
+
+With --stub-pdp a benchmarks.stub_pdp server is started on the host and port
+of PERMIT_PDP. Decisions are cached per PERMIT_CACHE_TTL_SECONDS; set it to 0
+to put the PDP on every request's path.
+
+Usage (from the directory containing the package, with the app's .env
+settings exported; needs a DATABASE_URL it may write to):
+
+    python -m <package>.benchmarks.load --stub-pdp --pdp-latency-ms 5 \\
+        --scenarios login,list,fetch,mixed --requests 2000 --concurrency 32
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List
+from urllib.parse import urlparse
+
+import httpx
+
+from .. import settings
+from ..main import app
+from ..models import Users
+from ..services import UserService
+from ..utils.auth_utils import create_access_token
+from .seed import (
+    BENCH_PASSWORD,
+    Dataset,
+    add_scale_arguments,
+    dataset_from_arguments,
+    load,
+)
+from .stub_pdp import serve_stub_pdp
+
+
+@dataclass
+class Caller:
+    email: str
+    tenant_id: str
+    author_id: str
+    headers: Dict[str, str]
+    article_ids: List[str]
+
+
+class Context:
+    """Seeded callers shared by the scenarios."""
+
+    def __init__(self, dataset: Dataset, seed: int, write_ratio: float):
+        self.rng = random.Random(seed)
+        self.write_ratio = write_ratio
+        self.callers = []
+        for user in dataset.users:
+            token = create_access_token(UserService.principal_claims(Users(**user)))
+            tenant_id = user["active_workspace"]
+            self.callers.append(
+                Caller(
+                    email=user["email"],
+                    tenant_id=str(tenant_id),
+                    author_id=str(user["id"]),
+                    headers={"Authorization": f"Bearer {token}"},
+                    article_ids=[
+                        str(a) for a in dataset.articles_by_tenant.get(tenant_id, [])
+                    ],
+                )
+            )
+
+    def caller(self) -> Caller:
+        return self.rng.choice(self.callers)
+
+
+Scenario = Callable[[httpx.AsyncClient, Context], Awaitable[httpx.Response]]
+
+
+async def login(client: httpx.AsyncClient, ctx: Context) -> httpx.Response:
+    return await client.post(
+        "/auth/login",
+        data={"username": ctx.caller().email, "password": BENCH_PASSWORD},
+    )
+
+
+async def list_articles(client: httpx.AsyncClient, ctx: Context) -> httpx.Response:
+    caller = ctx.caller()
+    return await client.get(
+        "/knowledge-articles/", params={"limit": 20}, headers=caller.headers
+    )
+
+
+async def fetch_article(client: httpx.AsyncClient, ctx: Context) -> httpx.Response:
+    caller = ctx.caller()
+    article_id = ctx.rng.choice(caller.article_ids)
+    return await client.get(f"/knowledge-articles/{article_id}", headers=caller.headers)
+
+
+async def create_article(client: httpx.AsyncClient, ctx: Context) -> httpx.Response:
+    caller = ctx.caller()
+    return await client.post(
+        "/knowledge-articles/",
+        json={
+            "title": f"Load test {ctx.rng.getrandbits(32):08x}",
+            "tenant_id": caller.tenant_id,
+            "author_id": caller.author_id,
+            "content": "1. restart the service\n2. check the logs\n" * 20,
+            "tags": ["runbook"],
+        },
+        headers=caller.headers,
+    )
+
+
+async def update_article(client: httpx.AsyncClient, ctx: Context) -> httpx.Response:
+    caller = ctx.caller()
+    article_id = ctx.rng.choice(caller.article_ids)
+    return await client.patch(
+        f"/knowledge-articles/{article_id}",
+        json={"content": f"Edited by the load test ({ctx.rng.getrandbits(32)})"},
+        headers=caller.headers,
+    )
+
+
+async def mixed(client: httpx.AsyncClient, ctx: Context) -> httpx.Response:
+    if ctx.rng.random() < ctx.write_ratio:
+        write = create_article if ctx.rng.random() < 0.5 else update_article
+        return await write(client, ctx)
+    read = list_articles if ctx.rng.random() < 0.5 else fetch_article
+    return await read(client, ctx)
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "login": login,
+    "list": list_articles,
+    "fetch": fetch_article,
+    "mixed": mixed,
+}
+# Scenarios whose clients fire together and wait for each other
+BURSTY = {"login"}
+
+
+async def drive(
+    client: httpx.AsyncClient,
+    ctx: Context,
+    name: str,
+    total: int,
+    concurrency: int,
+) -> dict:
+    scenario = SCENARIOS[name]
+    latencies: List[float] = []
+    errors = 0
+
+    async def one():
+        nonlocal errors
+        start = time.perf_counter()
+        response = await scenario(client, ctx)
+        latencies.append(time.perf_counter() - start)
+        errors += response.status_code >= 400
+
+    start = time.perf_counter()
+    if name in BURSTY:
+        for burst in range(0, total, concurrency):
+            await asyncio.gather(
+                *(one() for _ in range(min(concurrency, total - burst)))
+            )
+    else:
+        remaining = iter(range(total))
+
+        async def worker():
+            for _ in remaining:
+                await one()
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    p50, p95, p99 = (
+        statistics.quantiles(latencies, n=100)[i] * 1000 for i in (49, 94, 98)
+    )
+    return {
+        "requests": total,
+        "errors": errors,
+        "rps": total / elapsed,
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "p99_ms": p99,
+    }
+
+
+async def measure_allocations(
+    client: httpx.AsyncClient, ctx: Context, name: str, total: int, concurrency: int
+) -> dict:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        await drive(client, ctx, name, total, concurrency)
+        gc.collect()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "peak_kib": (peak - baseline) / 1024,
+        "retained_b_per_request": (current - baseline) / total,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> List[str]:
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if result["rps"] < before["rps"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: {result['rps']:.0f} req/s, was {before['rps']:.0f}"
+            )
+        if result["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: p95 {result['p95_ms']:.1f} ms, was {before['p95_ms']:.1f}"
+            )
+    return regressions
+
+
+def print_results(results: dict) -> None:
+    print(
+        f"{'scenario':>8} {'req/s':>9} {'p50':>8} {'p95':>8} {'p99':>8} {'errors':>7}"
+        f" {'peak KiB':>9} {'kept B/req':>10}"
+    )
+    for name, r in results.items():
+        allocations = (
+            f" {r['peak_kib']:9.0f} {r['retained_b_per_request']:10.0f}"
+            if "peak_kib" in r
+            else ""
+        )
+        print(
+            f"{name:>8} {r['rps']:9.0f} {r['p50_ms']:8.2f} {r['p95_ms']:8.2f}"
+            f" {r['p99_ms']:8.2f} {r['errors']:7d}{allocations}"
+        )
+
+
+async def run(args: argparse.Namespace, names: List[str]) -> dict:
+    dataset = dataset_from_arguments(args)
+    await load(dataset)
+    ctx = Context(dataset, args.seed, args.write_ratio)
+    results = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", timeout=None
+        ) as client:
+            for name in names:
+                await drive(client, ctx, name, args.warmup, args.concurrency)
+                results[name] = await drive(
+                    client, ctx, name, args.requests, args.concurrency
+                )
+                if args.allocations:
+                    results[name].update(
+                        await measure_allocations(
+                            client,
+                            ctx,
+                            name,
+                            min(args.requests, 500),
+                            args.concurrency,
+                        )
+                    )
+    return results
+
+
+async def main(args: argparse.Namespace) -> int:
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    if args.stub_pdp:
+        pdp = urlparse(settings.permit_pdp)
+        async with serve_stub_pdp(
+            pdp.hostname,
+            pdp.port or 80,
+            args.pdp_latency_ms,
+            args.pdp_jitter_ms,
+        ):
+            results = await run(args, names)
+    else:
+        results = await run(args, names)
+
+    print_results(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_scale_arguments(parser)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--write-ratio", type=float, default=0.1)
+    parser.add_argument("--allocations", action="store_true")
+    parser.add_argument("--stub-pdp", action="store_true")
+    parser.add_argument("--pdp-latency-ms", type=float, default=5.0)
+    parser.add_argument("--pdp-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--baseline", help="JSON results of an earlier run")
+    parser.add_argument("--tolerance", type=float, default=0.1)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,139 @@
+"""Check the number of SQL statements each article read path issues.
+
+Seeds a tenant with articles from several authors inside a transaction that
+is rolled back at the end, runs every listing/detail variant, including each
+?include= expansion, through ArticleService and the response serializer, and
+compares the statements issued against a fixed budget. An N+1 regression,
+such as a relationship that is lazily loaded per row, pushes a path over its
+budget and makes the script exit non-zero, so it can gate CI.
+
+Usage (from the directory containing the package, with the app's .env
+settings exported; needs a DATABASE_URL it may write to):
+
+    python -m <package>.benchmarks.query_counts --articles 40 --authors 8
+"""
+
+import argparse
+import asyncio
+import sys
+import uuid
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database import engine
+from ..models import KnowledgeArticles, Tenants, UserRoles, Users
+from ..services.knowledge_articles import (
+    ArticleService,
+    article_cache,
+    serialize_article,
+)
+
+# Statements allowed per path, independent of the number of rows
+BUDGETS = {
+    "list": 1,
+    "list?include_content=false": 1,
+    "list?include=author": 2,
+    "list?include=tenant": 1,
+    "list?include=author,tenant": 2,
+    "detail": 1,
+    "detail?include=author": 1,
+    "detail?include=author,tenant": 1,
+}
+
+
+class StatementCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args, **kwargs):
+        self.count += 1
+
+
+async def seed(db: AsyncSession, articles: int, authors: int):
+    tenant_id = uuid.uuid4()
+    users = [
+        Users(
+            id=uuid.uuid4(),
+            email=f"query-counts-{uuid.uuid4()}@example.com",
+            name=f"Author {i}",
+            password_hash="x",
+            active_workspace=tenant_id,
+            workspaces=[tenant_id],
+            role=UserRoles.EDITOR,
+        )
+        for i in range(authors)
+    ]
+    db.add_all(users)
+    await db.flush()
+    db.add(Tenants(id=tenant_id, name=f"query-counts-{tenant_id}", owner=users[0].id))
+    await db.flush()
+    rows = [
+        KnowledgeArticles(
+            id=uuid.uuid4(),
+            tenant_id=tenant_id,
+            author_id=users[i % authors].id,
+            title=f"Article {i}",
+            content="body " * 50,
+            tags=["runbook"],
+        )
+        for i in range(articles)
+    ]
+    db.add_all(rows)
+    await db.flush()
+    return str(tenant_id), str(rows[0].id)
+
+
+async def run_path(db: AsyncSession, path: str, tenant_id: str, article_id: str):
+    include = path.split("include=")[1].split(",") if "include=" in path else []
+    if path.startswith("list"):
+        include_content = "include_content=false" not in path
+        articles, _ = await ArticleService.retrieve_tenant_articles(
+            db,
+            tenant_id,
+            limit=100,
+            include_content=include_content,
+            include=include,
+        )
+        # Serializing is where lazily loaded relationships would fire
+        return [serialize_article(a, include_content, include) for a in articles]
+    return await ArticleService.get_article_by_id(
+        db, tenant_id, article_id, include=include
+    )
+
+
+async def main(articles: int, authors: int) -> int:
+    counter = StatementCounter()
+    failures = 0
+    async with engine.connect() as conn:
+        transaction = await conn.begin()
+        db = AsyncSession(
+            bind=conn, join_transaction_mode="create_savepoint", autoflush=False
+        )
+        event.listen(conn.sync_connection, "before_cursor_execute", counter)
+        try:
+            tenant_id, article_id = await seed(db, articles, authors)
+            print(f"{'path':<32} {'statements':>10} {'budget':>7}")
+            for path, budget in BUDGETS.items():
+                # Nothing may be answered from the identity map or the cache
+                db.expunge_all()
+                article_cache.local.clear()
+                counter.count = 0
+                await run_path(db, path, tenant_id, article_id)
+                verdict = "ok" if counter.count <= budget else "OVER BUDGET"
+                failures += counter.count > budget
+                print(f"{path:<32} {counter.count:>10} {budget:>7}  {verdict}")
+        finally:
+            event.remove(conn.sync_connection, "before_cursor_execute", counter)
+            await db.close()
+            await transaction.rollback()
+    await engine.dispose()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--articles", type=int, default=40)
+    parser.add_argument("--authors", type=int, default=8)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.articles, args.authors)))
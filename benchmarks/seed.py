@@ -0,0 +1,176 @@
+"""Seed the database with a reproducible benchmark dataset.
+
+The same --seed and scale always produce the same tenants, users and
+articles, UUIDs included, so runs on different machines or before and after
+an upgrade read the same data. Re-seeding is a no-op for rows that already
+exist. Every benchmark user has the password BENCH_PASSWORD and an e-mail
+ending in @bench-<seed>.example.com.
+
+Rows are written directly, not through the services: nothing is pushed to
+Permit (point PERMIT_PDP at benchmarks.stub_pdp instead) and articles have no
+revision history until they are first edited.
+
+Usage (from the directory containing the package, with the app's .env
+settings exported; needs a DATABASE_URL it may write to):
+
+    python -m <package>.benchmarks.seed --tenants 10 --users 20 --articles 500
+"""
+
+import argparse
+import asyncio
+import random
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from sqlalchemy.dialects.postgresql import insert
+
+from ..database import create_tables, engine
+from ..models import ArticleStatus, KnowledgeArticles, Tenants, UserRoles, Users
+from ..models.users import user_tenants
+from ..utils.auth_utils import pwd_context
+
+BENCH_PASSWORD = "bench-password"
+# Rows per INSERT statement
+CHUNK_SIZE = 1000
+
+WORDS = (
+    "restart service check logs deploy rollback database replica queue "
+    "timeout retry alert on-call escalate verify health endpoint config "
+    "tenant permission cache latency error rate dashboard runbook step"
+).split()
+TAGS = ["runbook", "incident", "onboarding", "postmortem", "howto", "faq"]
+
+
+@dataclass
+class Dataset:
+    seed: int
+    tenants: List[dict] = field(default_factory=list)
+    users: List[dict] = field(default_factory=list)
+    memberships: List[dict] = field(default_factory=list)
+    articles: List[dict] = field(default_factory=list)
+    # tenant id -> ids of its articles, for scenarios picking fetch targets
+    articles_by_tenant: Dict[uuid.UUID, List[uuid.UUID]] = field(default_factory=dict)
+
+
+def _uuid(rng: random.Random) -> uuid.UUID:
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+def _body(rng: random.Random, size: int) -> str:
+    lines, length = [], 0
+    while length < size:
+        line = f"{len(lines) + 1}. " + " ".join(rng.choices(WORDS, k=12)) + "\n"
+        lines.append(line)
+        length += len(line)
+    return "".join(lines)[:size]
+
+
+def generate(
+    seed: int,
+    tenants: int,
+    users_per_tenant: int,
+    articles_per_tenant: int,
+    content_size: int = 4000,
+) -> Dataset:
+    """Build the rows for a dataset; touches neither the database nor Permit."""
+    rng = random.Random(seed)
+    # Hashed once: every user shares the password, and bcrypt is slow
+    password_hash = pwd_context.hash(BENCH_PASSWORD)
+    epoch = datetime(2024, 1, 1)
+    dataset = Dataset(seed=seed)
+
+    for t in range(tenants):
+        tenant_id = _uuid(rng)
+        members = []
+        for u in range(users_per_tenant):
+            user = {
+                "id": _uuid(rng),
+                "email": f"user-{t}-{u}@bench-{seed}.example.com",
+                "name": f"Bench User {t}-{u}",
+                "password_hash": password_hash,
+                "active_workspace": tenant_id,
+                "workspaces": [tenant_id],
+                # First user of each tenant administers it
+                "role": UserRoles.ADMIN if u == 0 else UserRoles.EDITOR,
+                "is_active": True,
+            }
+            members.append(user)
+            dataset.memberships.append({"user_id": user["id"], "tenant_id": tenant_id})
+        dataset.users.extend(members)
+        dataset.tenants.append(
+            {
+                "id": tenant_id,
+                "name": f"bench-{seed}-tenant-{t}",
+                "description": "Benchmark tenant",
+                "owner": members[0]["id"] if members else None,
+            }
+        )
+
+        article_ids = []
+        for a in range(articles_per_tenant):
+            created_at = epoch + timedelta(minutes=rng.randrange(525_600))
+            article = {
+                "id": _uuid(rng),
+                "tenant_id": tenant_id,
+                "author_id": rng.choice(members)["id"],
+                "title": f"Runbook {t}-{a}: " + " ".join(rng.choices(WORDS, k=4)),
+                "content": _body(rng, rng.randint(content_size // 4, content_size)),
+                "tags": rng.sample(TAGS, k=rng.randint(0, 3)),
+                "status": rng.choice(list(ArticleStatus)),
+                "created_at": created_at,
+                "updated_at": created_at,
+            }
+            dataset.articles.append(article)
+            article_ids.append(article["id"])
+        dataset.articles_by_tenant[tenant_id] = article_ids
+    return dataset
+
+
+async def _insert(conn, table, rows: List[dict]) -> None:
+    for start in range(0, len(rows), CHUNK_SIZE):
+        chunk = rows[start : start + CHUNK_SIZE]
+        await conn.execute(insert(table).on_conflict_do_nothing(), chunk)
+
+
+async def load(dataset: Dataset) -> None:
+    """Insert a generated dataset, skipping rows that already exist."""
+    await create_tables()
+    async with engine.begin() as conn:
+        await _insert(conn, Users.__table__, dataset.users)
+        await _insert(conn, Tenants.__table__, dataset.tenants)
+        await _insert(conn, user_tenants, dataset.memberships)
+        await _insert(conn, KnowledgeArticles.__table__, dataset.articles)
+
+
+def add_scale_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--tenants", type=int, default=10)
+    parser.add_argument("--users", type=int, default=20, help="per tenant")
+    parser.add_argument("--articles", type=int, default=500, help="per tenant")
+    parser.add_argument("--content-size", type=int, default=4000)
+
+
+def dataset_from_arguments(args: argparse.Namespace) -> Dataset:
+    return generate(
+        args.seed, args.tenants, args.users, args.articles, args.content_size
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    dataset = dataset_from_arguments(args)
+    try:
+        await load(dataset)
+    finally:
+        await engine.dispose()
+    print(
+        f"seed {dataset.seed}: {len(dataset.tenants)} tenants,"
+        f" {len(dataset.users)} users, {len(dataset.articles)} articles"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_scale_arguments(parser)
+    asyncio.run(main(parser.parse_args()))
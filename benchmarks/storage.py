@@ -0,0 +1,156 @@
+"""Compare article body storage size and read latency per storage mode.
+
+Each mode gets a scratch table with the knowledge_articles layout, filled
+with the same generated runbook-like bodies:
+
+    external  no compression (STORAGE EXTERNAL), the upper bound on size
+    pglz      Postgres' default TOAST compression at the default threshold
+    lz4       what ARTICLE_CONTENT_COMPRESSION=lz4 configures
+    lz4-512   lz4 with ARTICLE_CONTENT_COMPRESSION_THRESHOLD=512
+
+For every mode it reports the stored body and table sizes and the latency of
+a listing page with and without content (the deferred-content path) and of
+single-article reads. The scratch tables are dropped afterwards.
+
+Usage (from the directory containing the package, with the app's .env
+settings exported; needs a Postgres 14+ DATABASE_URL):
+
+    python -m <package>.benchmarks.storage --rows 2000 --content-size 20000
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+
+from sqlalchemy import text
+
+from ..database import engine
+
+MODES = {
+    "external": ["ALTER TABLE {t} ALTER COLUMN content SET STORAGE EXTERNAL"],
+    "pglz": ["ALTER TABLE {t} ALTER COLUMN content SET COMPRESSION pglz"],
+    "lz4": ["ALTER TABLE {t} ALTER COLUMN content SET COMPRESSION lz4"],
+    "lz4-512": [
+        "ALTER TABLE {t} ALTER COLUMN content SET COMPRESSION lz4",
+        "ALTER TABLE {t} SET (toast_tuple_target = 512)",
+    ],
+}
+
+WORDS = (
+    "restart service check logs deploy rollback database replica queue "
+    "timeout retry alert on-call escalate verify health endpoint config "
+    "tenant permission cache latency error rate dashboard runbook step"
+).split()
+
+
+def make_body(rng: random.Random, size: int) -> str:
+    lines, length = [], 0
+    while length < size:
+        line = f"{len(lines) + 1}. " + " ".join(rng.choices(WORDS, k=12)) + "\n"
+        lines.append(line)
+        length += len(line)
+    return "".join(lines)[:size]
+
+
+async def timed(conn, sql: str, params_list) -> float:
+    """Mean latency in ms of running sql once per params dict."""
+    start = time.perf_counter()
+    for params in params_list:
+        (await conn.execute(text(sql), params)).all()
+    return (time.perf_counter() - start) / len(params_list) * 1000
+
+
+async def bench_mode(mode: str, rows: list, rounds: int) -> dict:
+    table = f"bench_articles_{mode.replace('-', '_')}"
+    async with engine.begin() as conn:
+        await conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+        await conn.execute(
+            text(
+                f"CREATE TABLE {table} (id uuid PRIMARY KEY, tenant_id uuid NOT NULL,"
+                " title varchar NOT NULL, content text NOT NULL,"
+                " created_at timestamp NOT NULL DEFAULT now())"
+            )
+        )
+        for statement in MODES[mode]:
+            await conn.execute(text(statement.format(t=table)))
+        await conn.execute(
+            text(
+                f"INSERT INTO {table} (id, tenant_id, title, content)"
+                " VALUES (:id, :tenant_id, :title, :content)"
+            ),
+            rows,
+        )
+    async with engine.connect() as conn:
+        await conn.execute(text(f"ANALYZE {table}"))
+        sizes = (
+            await conn.execute(
+                text(
+                    f"SELECT avg(pg_column_size(content)), avg(octet_length(content)),"
+                    f" pg_total_relation_size('{table}') FROM {table}"
+                )
+            )
+        ).one()
+
+        tenant = {"tenant_id": rows[0]["tenant_id"]}
+        page = (
+            f"FROM {table} WHERE tenant_id = :tenant_id"
+            " ORDER BY created_at DESC, id DESC LIMIT 20"
+        )
+        sample = random.Random(0).sample(rows, min(rounds, len(rows)))
+        ids = [{"id": row["id"]} for row in sample]
+        result = {
+            "stored": sizes[0],
+            "raw": sizes[1],
+            "table": sizes[2],
+            "page_with_content": await timed(
+                conn, f"SELECT id, title, content {page}", [tenant] * rounds
+            ),
+            "page_without_content": await timed(
+                conn, f"SELECT id, title {page}", [tenant] * rounds
+            ),
+            "fetch_by_id": await timed(
+                conn, f"SELECT id, title, content FROM {table} WHERE id = :id", ids
+            ),
+        }
+    async with engine.begin() as conn:
+        await conn.execute(text(f"DROP TABLE {table}"))
+    return result
+
+
+async def main(rows: int, rounds: int, content_size: int) -> None:
+    rng = random.Random(42)
+    tenant_id = uuid.uuid4()
+    data = [
+        {
+            "id": uuid.uuid4(),
+            "tenant_id": tenant_id,
+            "title": f"Runbook {i}",
+            "content": make_body(rng, rng.randint(content_size // 4, content_size)),
+        }
+        for i in range(rows)
+    ]
+    print(
+        f"{'mode':>9} {'body B':>8} {'stored B':>9} {'table MB':>9}"
+        f" {'page+body':>10} {'page':>8} {'by id':>8}  (ms)"
+    )
+    try:
+        for mode in MODES:
+            r = await bench_mode(mode, data, rounds)
+            print(
+                f"{mode:>9} {r['raw']:8.0f} {r['stored']:9.0f}"
+                f" {r['table'] / 2**20:9.2f} {r['page_with_content']:10.3f}"
+                f" {r['page_without_content']:8.3f} {r['fetch_by_id']:8.3f}"
+            )
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--content-size", type=int, default=20000)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.rounds, args.content_size))
@@ -0,0 +1,91 @@
+"""A stand-in for the Permit PDP with configurable latency.
+
+Answers the two endpoints the Permit SDK calls, /allowed and /allowed/bulk,
+after sleeping --latency-ms plus up to --jitter-ms, and allows every request
+except a random --deny-ratio of them. Point PERMIT_PDP at it so benchmarks
+measure the API rather than the network path to a real PDP.
+
+Usage (from the directory containing the package):
+
+    python -m <package>.benchmarks.stub_pdp --port 7766 --latency-ms 5
+
+benchmarks.load starts one itself when run with --stub-pdp.
+"""
+
+import argparse
+import asyncio
+import random
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+import uvicorn
+from fastapi import FastAPI, Request
+
+
+def build_app(
+    latency_ms: float, jitter_ms: float = 0.0, deny_ratio: float = 0.0, seed: int = 0
+) -> FastAPI:
+    app = FastAPI()
+    rng = random.Random(seed)
+    app.state.checks = 0
+
+    async def decide() -> bool:
+        app.state.checks += 1
+        delay = latency_ms + rng.uniform(0, jitter_ms)
+        if delay:
+            await asyncio.sleep(delay / 1000)
+        return rng.random() >= deny_ratio
+
+    @app.post("/allowed")
+    async def allowed(request: Request):
+        return {"allow": await decide()}
+
+    @app.post("/allowed/bulk")
+    async def allowed_bulk(request: Request):
+        checks = await request.json()
+        # One round trip for the whole batch, like the real PDP
+        allow = await decide()
+        return {"allow": [{"allow": allow} for _ in checks]}
+
+    return app
+
+
+@asynccontextmanager
+async def serve_stub_pdp(
+    host: str,
+    port: int,
+    latency_ms: float,
+    jitter_ms: float = 0.0,
+    deny_ratio: float = 0.0,
+) -> AsyncIterator[FastAPI]:
+    """Run the stub PDP on host:port for the duration of the block."""
+    app = build_app(latency_ms, jitter_ms, deny_ratio)
+    server = uvicorn.Server(
+        uvicorn.Config(app, host=host, port=port, log_level="warning")
+    )
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        if task.done():
+            task.result()  # surfaces e.g. "address already in use"
+        await asyncio.sleep(0.01)
+    try:
+        yield app
+    finally:
+        server.should_exit = True
+        await task
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7766)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--deny-ratio", type=float, default=0.0)
+    args = parser.parse_args()
+    uvicorn.run(
+        build_app(args.latency_ms, args.jitter_ms, args.deny_ratio),
+        host=args.host,
+        port=args.port,
+        log_level="warning",
+    )
@@ -1,3 +1,4 @@
+from typing import Dict, List, Literal, Optional
 from pydantic_settings import BaseSettings
 
 
@@ -11,6 +12,57 @@ class Settings(BaseSettings):
     permit_api_key: str
     permit_pdp: str
     env: str
+    instrumentation_enabled: bool = True
+    server_timing_header: bool = True
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout_seconds: float = 30.0
+    db_pool_recycle_seconds: int = 1800
+    db_pool_pre_ping: bool = False
+    db_release_before_permit: bool = True
+    database_replica_urls: List[str] = []
+    database_replica_sticky_seconds: float = 5.0
+    database_replica_eject_seconds: float = 30.0
+    permit_cache_size: int = 10_000
+    permit_cache_ttl_seconds: float = 60.0
+    permit_cache_negative_ttl_seconds: float = 10.0
+    permit_timeout_seconds: float = 2.0
+    permit_retries: int = 2
+    permit_backoff_base_seconds: float = 0.1
+    permit_backoff_cap_seconds: float = 1.0
+    permit_breaker_failure_threshold: int = 5
+    permit_breaker_reset_seconds: float = 30.0
+    permit_last_known_ttl_seconds: float = 86_400.0
+    # Per-action policy while the PDP is unavailable: closed, open or last_known
+    permit_degraded_policy: Dict[str, str] = {"read": "last_known"}
+    permit_decision_mode: Literal["remote", "local", "shadow"] = "remote"
+    permit_local_policy_file: Optional[str] = None
+    permit_local_policy_refresh_seconds: float = 60.0
+    permit_outbox_batch_size: int = 100
+    permit_outbox_poll_seconds: float = 1.0
+    permit_outbox_backoff_base_seconds: float = 1.0
+    permit_outbox_backoff_cap_seconds: float = 300.0
+    permit_outbox_max_attempts: int = 10
+    article_page_size: int = 20
+    article_page_size_max: int = 100
+    article_bulk_max_items: int = 1000
+    published_article_max_age_seconds: int = 60
+    article_revision_snapshot_interval: int = 32
+    article_content_compression: Optional[str] = None
+    article_content_compression_threshold: int = 2032
+    article_cache_size: int = 1000
+    article_cache_ttl_seconds: float = 30.0
+    article_cache_shared: bool = False
+    article_cache_shared_ttl_seconds: float = 300.0
+    token_revocation_backend: str = "memory"
+    redis_url: Optional[str] = None
+    principal_cache_size: int = 10_000
+    principal_cache_ttl_seconds: float = 30.0
+    trust_token_claims: bool = False
+    bcrypt_rounds: int = 12
+    password_hash_executor: str = "thread"
+    password_hash_workers: int = 4
+    password_hash_max_pending: int = 64
 
     class Config:
         env_file = ".env"  # This points to the .env file
@@ -1,13 +1,263 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import itertools
+import time
+from threading import Lock
+from typing import Dict, List, Optional
 
+from fastapi.logger import logger
+from sqlalchemy import event, exc, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.schema import CreateIndex
+
+from .models import KnowledgeArticles
 from .models.base import Base
+from .utils.instrumentation import instrument_engine
 from . import settings
 
 
-SQLALCHEMY_DATABASE_URL = settings.database_url
+def _async_database_url(url: str) -> str:
+    """Point a plain postgresql:// URL at the asyncpg driver."""
+    parsed = make_url(url)
+    if parsed.drivername in ("postgresql", "postgresql+psycopg2", "postgres"):
+        parsed = parsed.set(drivername="postgresql+asyncpg")
+    return parsed.render_as_string(hide_password=False)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long checkouts wait for a connection.
+
+    Counters are kept per pool, so the primary and each replica report
+    their own.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            # Only waits that ran out of pool_timeout; connect errors are not timeouts
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            with self._stats_lock:
+                self.checkouts += 1
+                self.wait_seconds_total += waited
+                self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+
+def _create_engine(url: str) -> AsyncEngine:
+    new_engine = create_async_engine(
+        _async_database_url(url),
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout_seconds,
+        pool_recycle=settings.db_pool_recycle_seconds,
+        pool_pre_ping=settings.db_pool_pre_ping,
+    )
+    if settings.instrumentation_enabled:
+        instrument_engine(new_engine.sync_engine)
+    return new_engine
+
+
+engine = _create_engine(settings.database_url)
+
+
+class ReplicaRouter:
+    """Picks a healthy read replica and tracks read-your-writes stickiness.
+
+    Replicas whose connections fail are ejected for a while. Keys marked as
+    written (e.g. a tenant or a user) keep their reads on the primary until
+    replication has had time to catch up.
+    """
+
+    def __init__(self, engines: List[AsyncEngine]):
+        self.engines = engines
+        self._next = itertools.cycle(range(len(engines)))
+        self._ejected_until: Dict[int, float] = {}
+        self._written: Dict[str, float] = {}
+        self.replica_reads = 0
+        self.sticky_reads = 0
+        self.ejections = 0
+
+    def pick(self) -> Optional[AsyncEngine]:
+        """Next healthy replica in round-robin order, or None."""
+        now = time.monotonic()
+        for _ in range(len(self.engines)):
+            index = next(self._next)
+            if self._ejected_until.get(index, 0.0) <= now:
+                return self.engines[index]
+        return None
+
+    def eject(self, replica: AsyncEngine) -> None:
+        index = self.engines.index(replica)
+        self._ejected_until[index] = (
+            time.monotonic() + settings.database_replica_eject_seconds
+        )
+        self.ejections += 1
+        logger.warning(f"Ejecting read replica {replica.url.host} after an error")
+
+    def mark_written(self, *keys: str) -> None:
+        """Pin reads of keys to the primary for DATABASE_REPLICA_STICKY_SECONDS."""
+        if not self.engines:
+            return
+        until = time.monotonic() + settings.database_replica_sticky_seconds
+        for key in keys:
+            self._written[key] = until
+        if len(self._written) > 10_000:
+            now = time.monotonic()
+            self._written = {k: t for k, t in self._written.items() if t > now}
+
+    def is_sticky(self, *keys: str) -> bool:
+        now = time.monotonic()
+        return any(self._written.get(key, 0.0) > now for key in keys)
+
+    def stats(self) -> Dict[str, object]:
+        now = time.monotonic()
+        return {
+            "replicas": len(self.engines),
+            "healthy": sum(
+                1
+                for index in range(len(self.engines))
+                if self._ejected_until.get(index, 0.0) <= now
+            ),
+            "replica_reads": self.replica_reads,
+            "sticky_reads": self.sticky_reads,
+            "ejections": self.ejections,
+            "pools": [pool_stats(replica) for replica in self.engines],
+        }
+
+
+replica_router = ReplicaRouter(
+    [_create_engine(url) for url in settings.database_replica_urls]
+)
+
+
+def _eject_on_error(replica: AsyncEngine):
+    def handle_error(context):
+        if context.is_disconnect or context.connection is None:
+            replica_router.eject(replica)
+
+    return handle_error
+
+
+for _replica in replica_router.engines:
+    event.listen(_replica.sync_engine, "handle_error", _eject_on_error(_replica))
+
+
+def read_replica(*sticky_keys: str) -> Dict[str, bool]:
+    """Execution options letting a read-only statement run on a replica,
+    unless one of sticky_keys was written recently."""
+    if not replica_router.engines:
+        return {}
+    if replica_router.is_sticky(*sticky_keys):
+        replica_router.sticky_reads += 1
+        return {}
+    return {"use_replica": True}
+
+
+class RoutingSession(Session):
+    """Sends statements marked with read_replica() to a replica; everything
+    else, including flushes, goes to the primary."""
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if (
+            clause is not None
+            and not self._flushing
+            and clause.get_execution_options().get("use_replica")
+        ):
+            replica = replica_router.pick()
+            if replica is not None:
+                replica_router.replica_reads += 1
+                return replica.sync_engine
+        return super().get_bind(mapper, clause=clause, **kw)
+
+
+SessionLocal = async_sessionmaker(
+    bind=engine,
+    sync_session_class=RoutingSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+
+async def create_tables() -> None:
+    """Create all tables registered on the declarative Base."""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await upgrade_article_schema(conn)
+        if settings.article_content_compression:
+            await configure_article_storage(conn)
+
+
+async def upgrade_article_schema(conn) -> None:
+    """Add the search column and indexes that create_all skips on a
+    knowledge_articles table created before they existed.
+
+    Every statement is a no-op once applied. Adding the generated column
+    rewrites the table once, holding an exclusive lock while it does.
+    """
+    table = KnowledgeArticles.__table__
+    expression = table.c.search_vector.computed.sqltext
+    await conn.execute(
+        text(
+            "ALTER TABLE knowledge_articles ADD COLUMN IF NOT EXISTS search_vector"
+            f" tsvector GENERATED ALWAYS AS ({expression}) STORED"
+        )
+    )
+    for index in table.indexes:
+        await conn.execute(CreateIndex(index, if_not_exists=True))
+
+
+CONTENT_COMPRESSION_METHODS = ("pglz", "lz4")
+
+
+async def configure_article_storage(conn) -> None:
+    """Compress article bodies in TOAST with the configured method once a row
+    outgrows ARTICLE_CONTENT_COMPRESSION_THRESHOLD bytes.
 
+    Postgres decompresses transparently, so the generated search column and
+    every query keep working. Only values written afterwards are affected.
+    """
+    method = settings.article_content_compression
+    if method not in CONTENT_COMPRESSION_METHODS:
+        raise ValueError(
+            f"ARTICLE_CONTENT_COMPRESSION must be one of {CONTENT_COMPRESSION_METHODS}"
+        )
+    # toast_tuple_target only accepts 128..8160
+    threshold = min(max(settings.article_content_compression_threshold, 128), 8160)
+    await conn.execute(
+        text(
+            f"ALTER TABLE knowledge_articles ALTER COLUMN content SET COMPRESSION {method}"
+        )
+    )
+    await conn.execute(
+        text(f"ALTER TABLE knowledge_articles SET (toast_tuple_target = {threshold})")
+    )
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL, pool_pre_ping=True)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def pool_stats(pool_engine: AsyncEngine = engine) -> Dict[str, float]:
+    """Current occupancy and cumulative checkout wait of an engine's pool."""
+    pool = pool_engine.pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "checkouts": pool.checkouts,
+        "timeouts": pool.timeouts,
+        "wait_seconds_total": round(pool.wait_seconds_total, 6),
+        "wait_seconds_max": round(pool.wait_seconds_max, 6),
+    }
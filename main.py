@@ -1,23 +1,45 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi.responses import PlainTextResponse
 from starlette.exceptions import HTTPException
 
 from .utils import (
-    verify_token_blacklist,
+    TokenRevocationMiddleware,
     http_exception_handler,
     server_exception_handler,
     validation_exception_handler,
 )
-from .database import engine
+from .database import engine, create_tables, pool_stats, replica_router
+from .utils.hashing import password_executor
+from .utils.instrumentation import InstrumentationMiddleware, render_metrics
 from .api_routes import authRouter, articlesRouter
-from .models.base import Base
+from .services.knowledge_articles import article_cache
+from .services.permit_service import keep_local_policy_fresh, local_policy
+from .services.permit_outbox import run_outbox_dispatcher
+from . import settings
 
-Base.metadata.create_all(bind=engine)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await create_tables()
+    outbox_dispatcher = asyncio.create_task(run_outbox_dispatcher())
+    policy_refresher = None
+    if settings.permit_decision_mode != "remote":
+        policy_refresher = asyncio.create_task(keep_local_policy_fresh())
+    yield
+    outbox_dispatcher.cancel()
+    if policy_refresher is not None:
+        policy_refresher.cancel()
+    password_executor.shutdown()
+    await engine.dispose()
+    for replica in replica_router.engines:
+        await replica.dispose()
 
-app = FastAPI()
+
+app = FastAPI(lifespan=lifespan)
 
 # register exception handlers
 app.add_exception_handler(Exception, server_exception_handler)
@@ -37,7 +59,11 @@ app.add_middleware(
 )
 
 
-app.add_middleware(BaseHTTPMiddleware, dispatch=verify_token_blacklist)
+app.add_middleware(TokenRevocationMiddleware)
+
+# Outermost, so the timings cover the other middleware too
+if settings.instrumentation_enabled:
+    app.add_middleware(InstrumentationMiddleware)
 
 # register api modules
 app.include_router(authRouter)
@@ -47,3 +73,24 @@ app.include_router(articlesRouter)
 @app.get("/")
 def read_root():
     return {"message": "Hello, World!"}
+
+
+@app.get("/cache-stats")
+def cache_stats():
+    return {
+        "data": {"articles": article_cache.stats(), "policy": local_policy.stats()},
+        "status": "success",
+    }
+
+
+@app.get("/db-stats")
+def db_stats():
+    return {
+        "data": {"pool": pool_stats(), "replicas": replica_router.stats()},
+        "status": "success",
+    }
+
+
+@app.get("/metrics")
+def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
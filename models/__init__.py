@@ -1,3 +1,6 @@
 from .users import Users, UserRoles
 from .tenants import Tenants
 from .knowledge_articles import ArticleStatus, KnowledgeArticles
+from .revoked_tokens import RevokedTokens
+from .permit_outbox import PermitOutbox
+from .article_revisions import ArticleRevisions
@@ -0,0 +1,40 @@
+from sqlalchemy import (
+    Column,
+    ForeignKey,
+    Integer,
+    LargeBinary,
+    String,
+    UniqueConstraint,
+)
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import deferred
+
+from .base import BaseModel
+
+
+class ArticleRevisions(BaseModel):
+    """One edit of a knowledge article.
+
+    Content is stored compressed, either as a full snapshot or as a delta
+    against an earlier revision (see utils.deltas.delta_base).
+    """
+
+    __tablename__ = "article_revisions"
+    __table_args__ = (UniqueConstraint("article_id", "revision"),)
+
+    article_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("knowledge_articles.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    revision = Column(Integer, nullable=False)
+    author_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    title = Column(String, nullable=False)
+    # Revision the delta applies to; None for a full snapshot
+    base_revision = Column(Integer, nullable=True)
+    content_length = Column(Integer, nullable=False)
+    # Only needed to rebuild content; never loaded for listings
+    data = deferred(Column(LargeBinary, nullable=False))
+
+    def __repr__(self):
+        return f"ArticleRevision({self.article_id}, {self.revision})"
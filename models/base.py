@@ -1,9 +1,9 @@
-from sqlalchemy import Column, func, DateTime
+from sqlalchemy import Column, func, DateTime, select
 from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from uuid import uuid4
 from typing import Any, List, Optional, Type, TypeVar
-from sqlalchemy.orm import Session
 
 Base = declarative_base()
 
@@ -19,72 +19,70 @@ class BaseModel(Base):
         DateTime, default=func.now(), onupdate=func.now(), nullable=False
     )
 
-    def add(self, obj: Any, session: Session) -> None:
+    def add(self, obj: Any, session: AsyncSession) -> None:
         """Adds the obj to the current db session."""
         if obj is not None:
-            try:
-                session.add(obj)
-            except Exception as ex:
-                session.rollback()
-                raise ex
+            session.add(obj)
 
-    def save(self, session: Session) -> None:
+    async def save(self, session: AsyncSession) -> None:
         """Commits all changes of the current db session."""
         try:
-            session.commit()
-            session.refresh(self)
+            await session.commit()
+            await session.refresh(self)
         except Exception as ex:
-            session.rollback()
+            await session.rollback()
             raise ex
 
-    def delete(self, session: Session) -> None:
+    async def delete(self, session: AsyncSession) -> None:
         """Deletes the current object from the database."""
         try:
-            session.delete(self)
-            session.commit()
+            await session.delete(self)
+            await session.commit()
         except Exception as ex:
-            session.rollback()
+            await session.rollback()
             raise ex
 
     @classmethod
-    def get_by_id(
-        cls: Type[T], session: Session, obj_id: Any, tenant_id: Optional[Any] = None
+    async def get_by_id(
+        cls: Type[T],
+        session: AsyncSession,
+        obj_id: Any,
+        tenant_id: Optional[Any] = None,
     ) -> Optional[T]:
         """Retrieve an object by its primary key and optional tenant_id."""
-        query = session.query(cls).filter_by(id=obj_id)
+        query = select(cls).filter_by(id=obj_id)
 
         # Apply tenant_id filter only if it's provided and the model has 'tenant_id'
         if tenant_id and hasattr(cls, "tenant_id"):
             query = query.filter_by(tenant_id=tenant_id)
 
-        return query.first()
+        result = await session.execute(query)
+        return result.scalars().first()
 
     @classmethod
-    def get_all(cls: Type[T], session: Session) -> List[T]:
+    async def get_all(cls: Type[T], session: AsyncSession) -> List[T]:
         """Retrieve all objects of this type."""
-        return session.query(cls).all()
+        result = await session.execute(select(cls))
+        return list(result.scalars().all())
 
     @classmethod
-    def filter_by(cls: Type[T], session: Session, **filters) -> List[T]:
+    async def filter_by(cls: Type[T], session: AsyncSession, **filters) -> List[T]:
         """Filter objects by given conditions."""
-        return session.query(cls).filter_by(**filters).all()
+        result = await session.execute(select(cls).filter_by(**filters))
+        return list(result.scalars().all())
 
     @classmethod
-    def get_one_by(cls: Type[T], session: Session, **filters) -> List[T]:
+    async def get_one_by(cls: Type[T], session: AsyncSession, **filters) -> Optional[T]:
         """Filter objects by given conditions."""
-        return session.query(cls).filter_by(**filters).first()
+        result = await session.execute(select(cls).filter_by(**filters).limit(1))
+        return result.scalars().first()
 
     @classmethod
-    def delete_by_id(cls: Type[T], session: Session, obj_id: Any) -> None:
+    async def delete_by_id(cls: Type[T], session: AsyncSession, obj_id: Any) -> None:
         """Delete an object by its primary key."""
-        obj = cls.get_by_id(session, obj_id)
+        obj = await cls.get_by_id(session, obj_id)
         if obj:
-            try:
-                session.delete(obj)
-                session.commit()
-            except Exception as ex:
-                session.rollback()
-                raise ex
+            await obj.delete(session)
 
     def update(self, **kwargs) -> None:
         """Update fields of the current object."""
@@ -1,6 +1,6 @@
-from sqlalchemy import Column, String, ForeignKey, Text, Enum
-from sqlalchemy.dialects.postgresql import UUID, ARRAY
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Computed, String, ForeignKey, Text, Enum, Index
+from sqlalchemy.dialects.postgresql import UUID, ARRAY, TSVECTOR
+from sqlalchemy.orm import deferred, relationship
 from enum import Enum as PyEnum
 
 from .base import BaseModel
@@ -11,17 +11,46 @@ class ArticleStatus(PyEnum):
     DRAFT = "draft"
 
 
+# Text search configuration shared by the generated column and search queries
+SEARCH_CONFIG = "english"
+
+
 class KnowledgeArticles(BaseModel):
     __tablename__ = "knowledge_articles"
+    __table_args__ = (
+        # Backs keyset pagination of a tenant's articles, newest first
+        Index(
+            "ix_knowledge_articles_tenant_created_id", "tenant_id", "created_at", "id"
+        ),
+        Index(
+            "ix_knowledge_articles_search_vector",
+            "search_vector",
+            postgresql_using="gin",
+        ),
+        Index("ix_knowledge_articles_tags", "tags", postgresql_using="gin"),
+    )
 
     tenant_id = Column(UUID(as_uuid=True), ForeignKey("tenants.id"), nullable=False)
     author_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     title = Column(String, nullable=False)
-    content = Column(Text, nullable=False)
+    # Bodies can be large; load them only where a query undefers them
+    content = deferred(Column(Text, nullable=False))
     tags = Column(ARRAY(String), nullable=True)
     status = Column(
         Enum(ArticleStatus), name="article_status", default=ArticleStatus.DRAFT
     )
+    # Title matches rank above body matches; never loaded unless asked for
+    search_vector = deferred(
+        Column(
+            TSVECTOR,
+            Computed(
+                f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A')"
+                f" || setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(content, '')),"
+                " 'B')",
+                persisted=True,
+            ),
+        )
+    )
 
     tenant = relationship("Tenants", back_populates="knowledge_articles")
     author = relationship("Users", back_populates="knowledge_articles")
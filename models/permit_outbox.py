@@ -0,0 +1,32 @@
+from sqlalchemy import Column, DateTime, Index, Integer, String, func
+from sqlalchemy.dialects.postgresql import JSONB
+
+from .base import BaseModel
+
+
+class PermitOutbox(BaseModel):
+    """Pending changes to push to Permit, written in the same transaction as
+    the rows they describe."""
+
+    __tablename__ = "permit_outbox"
+    __table_args__ = (
+        # Only undelivered, not dead-lettered events are ever polled
+        Index(
+            "ix_permit_outbox_pending",
+            "available_at",
+            postgresql_where="processed_at IS NULL AND failed_at IS NULL",
+        ),
+    )
+
+    kind = Column(String, nullable=False)
+    payload = Column(JSONB, nullable=False)
+    idempotency_key = Column(String, unique=True, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    available_at = Column(DateTime, default=func.now(), nullable=False)
+    processed_at = Column(DateTime, nullable=True)
+    # Set once PERMIT_OUTBOX_MAX_ATTEMPTS is used up; the event is no longer retried
+    failed_at = Column(DateTime, nullable=True)
+    last_error = Column(String, nullable=True)
+
+    def __repr__(self):
+        return f"PermitOutbox('{self.idempotency_key}', attempts={self.attempts})"
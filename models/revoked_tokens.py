@@ -0,0 +1,13 @@
+from sqlalchemy import Column, DateTime, String
+
+from .base import BaseModel
+
+
+class RevokedTokens(BaseModel):
+    __tablename__ = "revoked_tokens"
+
+    jti = Column(String, unique=True, index=True, nullable=False)
+    expires_at = Column(DateTime, index=True, nullable=False)
+
+    def __repr__(self):
+        return f"RevokedToken('{self.jti}', {self.expires_at})"
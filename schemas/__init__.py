@@ -2,6 +2,15 @@ from .knowledge_articles import (
     ArticleCreateSchema,
     ArticleUpdateSchema,
     ArticleSchema,
+    ArticleSummarySchema,
+    ArticleExpandedSchema,
+    ArticleSummaryExpandedSchema,
+    ArticleBulkUpdateSchema,
+    ArticleBulkDeleteSchema,
+    BulkItemResult,
+    ArticleRevisionSummarySchema,
+    ArticleRevisionSchema,
+    ArticleRevisionDiffSchema,
 )
-from .response import StandardResponse
+from .response import StandardResponse, PaginatedResponse
 from .tenants import TenantCreateSchema, TenantUpdateSchema, TenantSchema
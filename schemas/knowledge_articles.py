@@ -22,27 +22,83 @@ class ArticleUpdateSchema(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
-class ArticleSchema(BaseModel):
+class ArticleBulkUpdateSchema(ArticleUpdateSchema):
+    id: UUID
+
+
+class ArticleBulkDeleteSchema(BaseModel):
+    ids: List[UUID]
+
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[str] = None
+    status: str
+    detail: Optional[str] = None
+
+
+class ArticleSummarySchema(BaseModel):
     id: UUID
     title: str
     tenant_id: UUID
     author_id: UUID
-    content: str
     status: ArticleStatus
     created_at: datetime
     updated_at: datetime
     tags: Optional[List[str]]
 
-    def model_dump(self, **kwargs):
-        data = super().model_dump(**kwargs)
-        # Convert UUID fields to strings
-        data["id"] = str(data["id"])
-        data["author_id"] = str(data["author_id"])
-        data["tenant_id"] = str(data["tenant_id"])
-        data["status"] = data["status"].value
-        # Convert datetime fields
-        data["created_at"] = data["created_at"].isoformat()
-        data["updated_at"] = data["updated_at"].isoformat()
-        return data
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ArticleSchema(ArticleSummarySchema):
+    content: str
+
+
+class ArticleAuthorSchema(BaseModel):
+    id: UUID
+    email: str
+    name: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ArticleTenantSchema(BaseModel):
+    id: UUID
+    name: str
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class ArticleIncludes(BaseModel):
+    """Related resources expanded with ?include=author,tenant."""
+
+    author: Optional[ArticleAuthorSchema] = None
+    tenant: Optional[ArticleTenantSchema] = None
+
+
+class ArticleSummaryExpandedSchema(ArticleIncludes, ArticleSummarySchema):
+    pass
+
+
+class ArticleExpandedSchema(ArticleIncludes, ArticleSchema):
+    pass
+
+
+class ArticleRevisionSummarySchema(BaseModel):
+    revision: int
+    title: str
+    author_id: UUID
+    content_length: int
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ArticleRevisionSchema(ArticleRevisionSummarySchema):
+    content: str
+
+
+class ArticleRevisionDiffSchema(BaseModel):
+    from_revision: int
+    to_revision: int
+    diff: str
@@ -10,3 +10,7 @@ class StandardResponse(BaseModel, Generic[T]):
     data: Optional[T]  # Optional to handle cases where there's no data
     message: Optional[str]
     status: str
+
+
+class PaginatedResponse(StandardResponse[T], Generic[T]):
+    next_cursor: Optional[str] = None
@@ -33,16 +33,17 @@ class UserSchema(UserBase):
     role: str
     name: Optional[str] = None
 
-    def model_dump(self, **kwargs):
-        data = super().model_dump(**kwargs)
-        # Convert UUID fields to strings
-        data["id"] = str(data["id"])
-        data["workspaces"] = [str(workspace_id) for workspace_id in data["workspaces"]]
-        data["active_workspace"] = str(data["active_workspace"])
-        # Convert datetime fields
-        data["created_at"] = data["created_at"].isoformat()
-        data["updated_at"] = data["updated_at"].isoformat()
-        return data
+    model_config = ConfigDict(from_attributes=True)
+
+
+class PrincipalSchema(BaseModel):
+    """The subset of a user that authenticated routes depend on."""
+
+    id: UUID
+    email: str
+    active_workspace: UUID
+    role: UserRoles
+    is_active: bool
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -1,9 +1,15 @@
 from .permit_service import (
     check_user_permission,
-    create_permit_user,
-    create_tenant,
+    check_user_permissions,
+    update_user_role,
+    sync_tenants,
+    sync_users,
+    invalidate_user_permissions,
+    invalidate_tenant_permissions,
     Actions,
 )
+from .permit_outbox import PermitOutboxService, run_outbox_dispatcher
 from .knowledge_articles import ArticleService
-from .users import UserService, get_current_user_dep
+from .article_revisions import RevisionService
+from .users import UserService, get_current_user_dep, invalidate_principal
 from .tenants import TenantService
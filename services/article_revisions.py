@@ -0,0 +1,280 @@
+from itertools import groupby
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import func, insert, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from ..models import ArticleRevisions, KnowledgeArticles
+from ..schemas import ArticleRevisionDiffSchema, ArticleRevisionSchema
+from ..utils.deltas import (
+    apply_delta,
+    compress_text,
+    decompress_text,
+    delta_base,
+    make_delta,
+    text_diff,
+)
+from .. import settings
+
+
+def _revision_row(revision: ArticleRevisions) -> dict:
+    return {
+        column: getattr(revision, column)
+        for column in (
+            "article_id",
+            "revision",
+            "author_id",
+            "title",
+            "base_revision",
+            "content_length",
+            "data",
+        )
+    }
+
+
+class RevisionService:
+
+    @staticmethod
+    def initial_revision(article_id, title: str, content: str, author_id):
+        """Revision 1 of an article: a full snapshot."""
+        return ArticleRevisions(
+            article_id=article_id,
+            revision=1,
+            author_id=author_id,
+            title=title,
+            base_revision=None,
+            content_length=len(content),
+            data=compress_text(content),
+        )
+
+    @staticmethod
+    async def record_edit(
+        db: AsyncSession, before, title: str, content: str, author_id
+    ) -> int:
+        """Add the edited title/content as the article's next revision.
+
+        before is the article as it was (anything with id, title, content and
+        author_id); it becomes revision 1 of articles that predate revision
+        history. The caller must hold the article's row lock, which serializes
+        concurrent edits so revision numbers are unique, and commits.
+        """
+        revisions = await RevisionService.record_edits(
+            db, [(before, title, content, author_id)]
+        )
+        return revisions[before.id]
+
+    @staticmethod
+    async def record_edits(
+        db: AsyncSession, edits: List[Tuple[Any, str, str, Any]]
+    ) -> Dict[Any, int]:
+        """Add the next revision of many articles in a constant number of queries.
+
+        edits holds (before, title, content, author_id) per article, as for
+        record_edit. The caller must hold row locks on the articles and
+        commits. Returns the new revision number per article id.
+        """
+        if not edits:
+            return {}
+        article_ids = [before.id for before, *_ in edits]
+        result = await db.execute(
+            select(ArticleRevisions.article_id, func.max(ArticleRevisions.revision))
+            .where(ArticleRevisions.article_id.in_(article_ids))
+            .group_by(ArticleRevisions.article_id)
+        )
+        latest = dict(result.all())
+
+        rows, planned, known = [], [], {}
+        for before, title, content, author_id in edits:
+            if before.id not in latest:
+                # Revision 1 of an article that predates revision history
+                latest[before.id] = 1
+                rows.append(
+                    _revision_row(
+                        RevisionService.initial_revision(
+                            before.id, before.title, before.content, before.author_id
+                        )
+                    )
+                )
+                known[(before.id, 1)] = before.content
+            revision = latest[before.id] + 1
+            base = delta_base(revision, settings.article_revision_snapshot_interval)
+            planned.append((before.id, revision, base, title, content, author_id))
+
+        needed = [
+            (article_id, base)
+            for article_id, _, base, *_ in planned
+            if base is not None and (article_id, base) not in known
+        ]
+        known.update(await RevisionService.rebuild_contents(db, needed))
+
+        for article_id, revision, base, title, content, author_id in planned:
+            data = (
+                compress_text(content)
+                if base is None
+                else make_delta(known[(article_id, base)], content)
+            )
+            rows.append(
+                {
+                    "article_id": article_id,
+                    "revision": revision,
+                    "author_id": author_id,
+                    "title": title,
+                    "base_revision": base,
+                    "content_length": len(content),
+                    "data": data,
+                }
+            )
+        await db.execute(insert(ArticleRevisions).values(rows))
+        return {article_id: revision for article_id, revision, *_ in planned}
+
+    @staticmethod
+    async def rebuild_content(
+        db: AsyncSession, article_id, revision: int
+    ) -> Optional[str]:
+        """Content of a revision, rebuilt from its snapshot and deltas."""
+        contents = await RevisionService.rebuild_contents(db, [(article_id, revision)])
+        return next(iter(contents.values()), None)
+
+    @staticmethod
+    async def rebuild_contents(
+        db: AsyncSession, revisions: List[Tuple[Any, int]]
+    ) -> Dict[Tuple[Any, int], str]:
+        """Content of many (article_id, revision) pairs, rebuilt from their
+        snapshots and deltas.
+
+        Every delta chain is fetched by one recursive query; each is at most
+        log2(ARTICLE_REVISION_SNAPSHOT_INTERVAL) + 1 rows long. Pairs that
+        don't exist are left out.
+        """
+        if not revisions:
+            return {}
+        chain = (
+            select(
+                ArticleRevisions.article_id,
+                ArticleRevisions.revision.label("target"),
+                ArticleRevisions.revision,
+                ArticleRevisions.base_revision,
+                ArticleRevisions.data,
+            )
+            .where(
+                tuple_(ArticleRevisions.article_id, ArticleRevisions.revision).in_(
+                    revisions
+                )
+            )
+            .cte("revision_chain", recursive=True)
+        )
+        base = aliased(ArticleRevisions)
+        chain = chain.union_all(
+            select(
+                base.article_id,
+                chain.c.target,
+                base.revision,
+                base.base_revision,
+                base.data,
+            ).where(
+                base.article_id == chain.c.article_id,
+                base.revision == chain.c.base_revision,
+            )
+        )
+        result = await db.execute(
+            select(
+                chain.c.article_id,
+                chain.c.target,
+                chain.c.base_revision,
+                chain.c.data,
+            ).order_by(chain.c.article_id, chain.c.target, chain.c.revision)
+        )
+
+        contents = {}
+        for key, rows in groupby(result.all(), key=lambda row: row[:2]):
+            rows = list(rows)
+            if rows[0].base_revision is not None:
+                continue  # broken chain: the snapshot is missing
+            content = decompress_text(rows[0].data)
+            for row in rows[1:]:
+                content = apply_delta(content, row.data)
+            contents[tuple(key)] = content
+        return contents
+
+    @staticmethod
+    async def list_revisions(
+        db: AsyncSession,
+        tenant_id: str,
+        article_id: str,
+        limit: int,
+        before: Optional[int] = None,
+    ) -> List[ArticleRevisions]:
+        """A page of an article's revisions, newest first, without content."""
+        query = (
+            select(ArticleRevisions)
+            .join(
+                KnowledgeArticles, KnowledgeArticles.id == ArticleRevisions.article_id
+            )
+            .where(
+                ArticleRevisions.article_id == article_id,
+                KnowledgeArticles.tenant_id == tenant_id,
+            )
+        )
+        if before is not None:
+            query = query.where(ArticleRevisions.revision < before)
+
+        result = await db.execute(
+            query.order_by(ArticleRevisions.revision.desc()).limit(limit)
+        )
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def get_revision(
+        db: AsyncSession, tenant_id: str, article_id: str, revision: int
+    ) -> Optional[ArticleRevisionSchema]:
+        result = await db.execute(
+            select(ArticleRevisions)
+            .join(
+                KnowledgeArticles, KnowledgeArticles.id == ArticleRevisions.article_id
+            )
+            .where(
+                ArticleRevisions.article_id == article_id,
+                ArticleRevisions.revision == revision,
+                KnowledgeArticles.tenant_id == tenant_id,
+            )
+        )
+        row = result.scalars().first()
+        if row is None:
+            return None
+
+        content = await RevisionService.rebuild_content(db, article_id, revision)
+        return ArticleRevisionSchema(
+            revision=row.revision,
+            title=row.title,
+            author_id=row.author_id,
+            content_length=row.content_length,
+            created_at=row.created_at,
+            content=content,
+        )
+
+    @staticmethod
+    async def diff_revisions(
+        db: AsyncSession,
+        tenant_id: str,
+        article_id: str,
+        from_revision: int,
+        to_revision: int,
+    ) -> Optional[ArticleRevisionDiffSchema]:
+        """Unified diff of the content of two revisions."""
+        old = await RevisionService.get_revision(
+            db, tenant_id, article_id, from_revision
+        )
+        new = await RevisionService.get_revision(db, tenant_id, article_id, to_revision)
+        if old is None or new is None:
+            return None
+
+        return ArticleRevisionDiffSchema(
+            from_revision=from_revision,
+            to_revision=to_revision,
+            diff=text_diff(
+                old.content,
+                new.content,
+                f"revision {from_revision}",
+                f"revision {to_revision}",
+            ),
+        )
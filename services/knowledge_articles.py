@@ -1,46 +1,563 @@
-from sqlalchemy.orm import Session
+from typing import AsyncIterator, Collection, List, Optional, Tuple
+from uuid import UUID, uuid4
+from sqlalchemy import cast, delete, func, insert, select, tuple_, update
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Bundle, defer, joinedload, selectinload, undefer
 from fastapi import HTTPException, status
 
-from ..schemas import ArticleCreateSchema, ArticleUpdateSchema
-from ..models import KnowledgeArticles
+from ..schemas import (
+    ArticleCreateSchema,
+    ArticleUpdateSchema,
+    ArticleBulkUpdateSchema,
+    ArticleSchema,
+    ArticleSummarySchema,
+    ArticleExpandedSchema,
+    ArticleSummaryExpandedSchema,
+    BulkItemResult,
+)
+from ..schemas.knowledge_articles import ArticleAuthorSchema, ArticleTenantSchema
+from ..models import ArticleStatus, KnowledgeArticles, Tenants, Users
+from ..models.knowledge_articles import SEARCH_CONFIG
+from ..utils.pagination import decode_cursor, encode_cursor
+from ..utils.cache import ReadThroughCache, RedisCacheTier, TTLCache
+from ..database import SessionLocal, read_replica, replica_router
+from .article_revisions import RevisionService
+from .. import settings
+
+
+# Tenant-scoped cache of single articles, invalidated by ArticleService writes
+article_cache = ReadThroughCache(
+    local=TTLCache(
+        maxsize=settings.article_cache_size, ttl=settings.article_cache_ttl_seconds
+    ),
+    shared=(
+        RedisCacheTier(
+            settings.redis_url,
+            prefix="article:",
+            ttl=settings.article_cache_shared_ttl_seconds,
+        )
+        if settings.article_cache_shared
+        else None
+    ),
+    dumps=lambda article: article.model_dump_json().encode(),
+    loads=ArticleSchema.model_validate_json,
+)
+
+
+def _same_uuid(a, b) -> bool:
+    # UUIDs may arrive in any case, with or without hyphens
+    try:
+        return UUID(str(a)) == UUID(str(b))
+    except ValueError:
+        return False
+
+
+def _article_cache_key(tenant_id, article_id) -> str:
+    return f"{tenant_id}:{article_id}".lower()
+
+
+def _content_option(include_content: bool):
+    # content is deferred on the model; listings without it raise on access
+    if include_content:
+        return undefer(KnowledgeArticles.content)
+    return defer(KnowledgeArticles.content, raiseload=True)
+
+
+# Relationships that can be expanded with ?include=
+ARTICLE_INCLUDES = ("author", "tenant")
+
+
+def _include_options(include: Collection[str], many: bool) -> list:
+    """Loader options for the requested relationships, in a bounded number of
+    queries: the tenant is joined (one row for every article), the author
+    is joined for one article and selectin-loaded for a page."""
+    options = []
+    if "author" in include:
+        loader = selectinload if many else joinedload
+        options.append(
+            loader(KnowledgeArticles.author).load_only(
+                Users.id, Users.email, Users.name
+            )
+        )
+    if "tenant" in include:
+        options.append(
+            joinedload(KnowledgeArticles.tenant).load_only(Tenants.id, Tenants.name)
+        )
+    return options
+
+
+def serialize_article(
+    article: KnowledgeArticles,
+    include_content: bool = True,
+    include: Collection[str] = (),
+) -> ArticleSummarySchema:
+    """Response schema for an article, with the requested relationships.
+
+    Relationships are only touched when requested, so they must have been
+    loaded with _include_options.
+    """
+    schema = ArticleSchema if include_content else ArticleSummarySchema
+    data = schema.model_validate(article)
+    if not include:
+        return data
+
+    expanded = (
+        ArticleExpandedSchema if include_content else ArticleSummaryExpandedSchema
+    )
+    return expanded(
+        **dict(data),
+        author=(
+            ArticleAuthorSchema.model_validate(article.author)
+            if "author" in include
+            else None
+        ),
+        tenant=(
+            ArticleTenantSchema.model_validate(article.tenant)
+            if "tenant" in include
+            else None
+        ),
+    )
+
+
+def _tenant_key(tenant_id) -> str:
+    # Read-your-writes: reads of a tenant stay on the primary after it changes
+    return f"tenant:{tenant_id}".lower()
 
 
 class ArticleService:
 
     @staticmethod
-    def create_article(db: Session, article: ArticleCreateSchema):
+    async def create_article(db: AsyncSession, article: ArticleCreateSchema):
         """Static method to create a new knowledge article in the database."""
 
-        new_article = KnowledgeArticles(
+        values = dict(
+            id=uuid4(),
             title=article.title,
             tenant_id=article.tenant_id,
             author_id=article.author_id,
             content=article.content,
             tags=article.tags,
+            status=ArticleStatus.DRAFT,
         )
-        new_article.add(new_article, db)
-        new_article.save(db)
+        try:
+            # Revisions reference the article, which therefore has to be
+            # inserted first. Only the timestamps are returned, so the
+            # generated search_vector is never sent back
+            result = await db.execute(
+                insert(KnowledgeArticles)
+                .values(**values)
+                .returning(KnowledgeArticles.created_at, KnowledgeArticles.updated_at)
+            )
+            created_at, updated_at = result.one()
+            new_article = KnowledgeArticles(
+                **values, created_at=created_at, updated_at=updated_at
+            )
+            db.add(
+                RevisionService.initial_revision(
+                    new_article.id, article.title, article.content, article.author_id
+                )
+            )
+            await db.commit()
+        except Exception as ex:
+            await db.rollback()
+            raise ex
+        replica_router.mark_written(_tenant_key(article.tenant_id))
 
         return new_article
 
     @staticmethod
-    def retrieve_tenant_articles(db: Session, tenant_id: str):
-        articles = KnowledgeArticles.filter_by(session=db, tenant_id=tenant_id)
-        return articles
+    async def bulk_create_articles(
+        db: AsyncSession, tenant_id: str, articles: List[ArticleCreateSchema]
+    ) -> List[BulkItemResult]:
+        """Insert many articles of one tenant in a single transaction."""
+        results, rows = [], []
+        for index, article in enumerate(articles):
+            if not _same_uuid(article.tenant_id, tenant_id):
+                results.append(
+                    BulkItemResult(
+                        index=index,
+                        status="error",
+                        detail="Article does not belong to the active workspace.",
+                    )
+                )
+                continue
+            rows.append((index, article.model_dump()))
+
+        if rows:
+            try:
+                inserted = await db.scalars(
+                    insert(KnowledgeArticles).returning(
+                        KnowledgeArticles.id, sort_by_parameter_order=True
+                    ),
+                    [row for _, row in rows],
+                )
+                inserted = inserted.all()
+                db.add_all(
+                    RevisionService.initial_revision(
+                        article_id, row["title"], row["content"], row["author_id"]
+                    )
+                    for (_, row), article_id in zip(rows, inserted)
+                )
+                await db.commit()
+            except Exception as ex:
+                await db.rollback()
+                raise ex
+            replica_router.mark_written(_tenant_key(tenant_id))
+
+            for (index, _), article_id in zip(rows, inserted):
+                results.append(
+                    BulkItemResult(index=index, id=str(article_id), status="created")
+                )
+
+        return sorted(results, key=lambda result: result.index)
 
     @staticmethod
-    def get_article_by_id(db: Session, tenant_id: str, article_id: str):
-        return KnowledgeArticles.get_by_id(
-            session=db, obj_id=article_id, tenant_id=tenant_id
+    async def bulk_update_articles(
+        db: AsyncSession,
+        tenant_id: str,
+        updates: List[ArticleBulkUpdateSchema],
+        author_id: Optional[str] = None,
+    ) -> List[BulkItemResult]:
+        """Apply many partial updates within one tenant in a single transaction."""
+        found = set(
+            await db.scalars(
+                select(KnowledgeArticles.id).where(
+                    KnowledgeArticles.tenant_id == tenant_id,
+                    KnowledgeArticles.id.in_([item.id for item in updates]),
+                )
+            )
+        )
+
+        results, rows = [], []
+        for index, item in enumerate(updates):
+            data = item.model_dump(exclude_unset=True, exclude_none=True)
+            if item.id not in found:
+                results.append(
+                    BulkItemResult(
+                        index=index,
+                        id=str(item.id),
+                        status="error",
+                        detail="Article not found.",
+                    )
+                )
+            elif data.keys() == {"id"}:
+                results.append(
+                    BulkItemResult(
+                        index=index,
+                        id=str(item.id),
+                        status="error",
+                        detail="No valid fields provided for update.",
+                    )
+                )
+            else:
+                rows.append(data)
+                results.append(
+                    BulkItemResult(index=index, id=str(item.id), status="updated")
+                )
+
+        if rows:
+            try:
+                await ArticleService._record_bulk_edits(db, rows, author_id)
+                # ORM bulk UPDATE by primary key, grouped into executemany batches
+                await db.execute(update(KnowledgeArticles), rows)
+                await db.commit()
+            except Exception as ex:
+                await db.rollback()
+                raise ex
+            replica_router.mark_written(_tenant_key(tenant_id))
+            await article_cache.invalidate(
+                *(_article_cache_key(tenant_id, row["id"]) for row in rows)
+            )
+
+        return results
+
+    @staticmethod
+    async def _record_bulk_edits(db: AsyncSession, rows: List[dict], author_id):
+        """Add a revision for every bulk update touching title or content."""
+        edits = {row["id"]: row for row in rows if "title" in row or "content" in row}
+        if not edits:
+            return
+        # Locked in id order so concurrent bulk edits can't deadlock
+        result = await db.execute(
+            select(
+                KnowledgeArticles.id,
+                KnowledgeArticles.title,
+                KnowledgeArticles.content,
+                KnowledgeArticles.author_id,
+            )
+            .where(KnowledgeArticles.id.in_(edits))
+            .order_by(KnowledgeArticles.id)
+            .with_for_update()
+        )
+        await RevisionService.record_edits(
+            db,
+            [
+                (
+                    before,
+                    edits[before.id].get("title", before.title),
+                    edits[before.id].get("content", before.content),
+                    author_id or before.author_id,
+                )
+                for before in result.all()
+            ],
         )
 
     @staticmethod
-    def update_article(
-        db: Session, article_id: str, tenant_id: str, update_obj: ArticleUpdateSchema
+    async def bulk_delete_articles(
+        db: AsyncSession, tenant_id: str, article_ids: List[UUID]
+    ) -> List[BulkItemResult]:
+        """Delete many articles of one tenant in a single statement."""
+        try:
+            deleted = set(
+                await db.scalars(
+                    delete(KnowledgeArticles)
+                    .where(
+                        KnowledgeArticles.tenant_id == tenant_id,
+                        KnowledgeArticles.id.in_(article_ids),
+                    )
+                    .returning(KnowledgeArticles.id)
+                )
+            )
+            await db.commit()
+        except Exception as ex:
+            await db.rollback()
+            raise ex
+        replica_router.mark_written(_tenant_key(tenant_id))
+        await article_cache.invalidate(
+            *(_article_cache_key(tenant_id, article_id) for article_id in deleted)
+        )
+
+        return [
+            BulkItemResult(
+                index=index,
+                id=str(article_id),
+                status="deleted" if article_id in deleted else "error",
+                detail=None if article_id in deleted else "Article not found.",
+            )
+            for index, article_id in enumerate(article_ids)
+        ]
+
+    @staticmethod
+    async def retrieve_tenant_articles(
+        db: AsyncSession,
+        tenant_id: str,
+        limit: int,
+        cursor: Optional[str] = None,
+        article_status: Optional[ArticleStatus] = None,
+        tag: Optional[str] = None,
+        author_id: Optional[str] = None,
+        include_content: bool = True,
+        include: Collection[str] = (),
+    ) -> Tuple[List[KnowledgeArticles], Optional[str]]:
+        """Fetch one page of a tenant's articles, newest first.
+
+        Returns the page and the cursor of the next page (None on the last page).
+        """
+        query = select(KnowledgeArticles).where(
+            KnowledgeArticles.tenant_id == tenant_id
+        )
+
+        if article_status:
+            query = query.where(KnowledgeArticles.status == article_status)
+        if tag:
+            query = query.where(KnowledgeArticles.tags.contains([tag]))
+        if author_id:
+            query = query.where(KnowledgeArticles.author_id == author_id)
+        query = query.options(
+            _content_option(include_content), *_include_options(include, many=True)
+        )
+        if cursor:
+            query = query.where(
+                tuple_(KnowledgeArticles.created_at, KnowledgeArticles.id)
+                < tuple_(*decode_cursor(cursor))
+            )
+
+        query = (
+            query.order_by(
+                KnowledgeArticles.created_at.desc(), KnowledgeArticles.id.desc()
+            )
+            .limit(limit + 1)
+            .execution_options(**read_replica(_tenant_key(tenant_id)))
+        )
+
+        result = await db.execute(query)
+        articles = list(result.scalars().all())
+
+        next_cursor = None
+        if len(articles) > limit:
+            articles = articles[:limit]
+            last = articles[-1]
+            next_cursor = encode_cursor(last.created_at, last.id)
+
+        return articles, next_cursor
+
+    @staticmethod
+    async def search_articles(
+        db: AsyncSession,
+        tenant_id: str,
+        limit: int,
+        offset: int = 0,
+        text: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        include_content: bool = False,
+    ) -> List[KnowledgeArticles]:
+        """Full-text and tag search within a tenant, best matches first."""
+        query = select(KnowledgeArticles).where(
+            KnowledgeArticles.tenant_id == tenant_id
+        )
+
+        if tags:
+            # Array containment (@>) is served by the GIN index on tags
+            query = query.where(KnowledgeArticles.tags.contains(tags))
+        if text:
+            ts_query = func.websearch_to_tsquery(cast(SEARCH_CONFIG, REGCONFIG), text)
+            query = query.where(
+                KnowledgeArticles.search_vector.bool_op("@@")(ts_query)
+            ).order_by(
+                func.ts_rank_cd(KnowledgeArticles.search_vector, ts_query).desc()
+            )
+        query = query.options(_content_option(include_content))
+
+        query = (
+            query.order_by(
+                KnowledgeArticles.created_at.desc(), KnowledgeArticles.id.desc()
+            )
+            .offset(offset)
+            .limit(limit)
+            .execution_options(**read_replica(_tenant_key(tenant_id)))
+        )
+
+        result = await db.execute(query)
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def stream_tenant_articles(
+        db: AsyncSession,
+        tenant_id: str,
+        batch_size: int = 500,
+        include_content: bool = True,
+    ) -> AsyncIterator[List[KnowledgeArticles]]:
+        """Stream every article of a tenant in batches via a server-side cursor."""
+        query = (
+            select(KnowledgeArticles)
+            .where(KnowledgeArticles.tenant_id == tenant_id)
+            .options(_content_option(include_content))
+            .order_by(KnowledgeArticles.created_at, KnowledgeArticles.id)
+            .execution_options(
+                yield_per=batch_size, **read_replica(_tenant_key(tenant_id))
+            )
+        )
+
+        result = await db.stream(query)
+        async for partition in result.scalars().partitions():
+            yield partition
+            # Rows already sent are not needed in the identity map anymore
+            db.expunge_all()
+
+    @staticmethod
+    async def get_article_by_id(
+        db: AsyncSession,
+        tenant_id: str,
+        article_id: str,
+        include: Collection[str] = (),
+    ) -> Optional[ArticleSchema]:
+        """Read an article through the article cache.
+
+        Expanded relationships are loaded in the same query and bypass the
+        cache, which only holds the article itself.
+        """
+        if include:
+            article = await db.scalar(
+                select(KnowledgeArticles)
+                .options(
+                    undefer(KnowledgeArticles.content),
+                    *_include_options(include, many=False),
+                )
+                .where(
+                    KnowledgeArticles.id == article_id,
+                    KnowledgeArticles.tenant_id == tenant_id,
+                )
+                .execution_options(**read_replica(_tenant_key(tenant_id)))
+            )
+            return serialize_article(article, include=include) if article else None
+
+        # Stickiness after a write is tracked per process, so another worker
+        # could read a lagging replica; the shared tier is filled from the
+        # primary only, or it would serve that stale row to every worker
+        replica_options = (
+            read_replica(_tenant_key(tenant_id)) if article_cache.shared is None else {}
+        )
+
+        async def load():
+            # Runs detached from the request that started it and is shared by
+            # concurrent misses, so it must not use that request's session,
+            # which is closed if the request is cancelled
+            async with SessionLocal() as session:
+                article = await session.scalar(
+                    select(KnowledgeArticles)
+                    .options(undefer(KnowledgeArticles.content))
+                    .where(
+                        KnowledgeArticles.id == article_id,
+                        KnowledgeArticles.tenant_id == tenant_id,
+                    )
+                    .execution_options(**replica_options)
+                )
+                return ArticleSchema.model_validate(article) if article else None
+
+        return await article_cache.get_or_load(
+            _article_cache_key(tenant_id, article_id), load
+        )
+
+    @staticmethod
+    async def get_article_version(
+        db: AsyncSession,
+        tenant_id: str,
+        article_id: str,
+        include: Collection[str] = (),
     ):
-        article = KnowledgeArticles.get_by_id(
-            session=db, obj_id=article_id, tenant_id=tenant_id
+        """Fetch only what identifies an article revision (id, updated_at, status),
+        plus the fields of the requested relationships as author/tenant bundles."""
+        columns = [
+            KnowledgeArticles.id,
+            KnowledgeArticles.updated_at,
+            KnowledgeArticles.status,
+        ]
+        if "author" in include:
+            columns.append(Bundle("author", Users.email, Users.name))
+        if "tenant" in include:
+            columns.append(Bundle("tenant", Tenants.name))
+        query = select(*columns)
+        if "author" in include:
+            query = query.outerjoin(KnowledgeArticles.author)
+        if "tenant" in include:
+            query = query.outerjoin(KnowledgeArticles.tenant)
+        result = await db.execute(
+            query.where(
+                KnowledgeArticles.id == article_id,
+                KnowledgeArticles.tenant_id == tenant_id,
+            ).execution_options(**read_replica(_tenant_key(tenant_id)))
         )
+        return result.first()
+
+    @staticmethod
+    async def update_article(
+        db: AsyncSession,
+        article_id: str,
+        tenant_id: str,
+        update_obj: ArticleUpdateSchema,
+        author_id: Optional[str] = None,
+    ):
+        query = select(KnowledgeArticles).where(
+            KnowledgeArticles.id == article_id,
+            KnowledgeArticles.tenant_id == tenant_id,
+        )
+        if update_obj.title is not None or update_obj.content is not None:
+            # The previous body is needed for the revision history
+            query = query.options(undefer(KnowledgeArticles.content))
+        # Locked until commit so concurrent edits can't both start from the
+        # same previous body or revision number
+        article = await db.scalar(query.with_for_update())
         if not article:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -57,17 +574,29 @@ class ArticleService:
                 detail="No valid fields provided for update.",
             )
 
+        if "title" in data or "content" in data:
+            await RevisionService.record_edit(
+                db,
+                article,
+                title=data.get("title", article.title),
+                content=data.get("content", article.content),
+                author_id=author_id or article.author_id,
+            )
         article.update(**data)
-        article.save(db)
+        await article.save(db)
+        replica_router.mark_written(_tenant_key(tenant_id))
+        await article_cache.invalidate(_article_cache_key(tenant_id, article_id))
 
     @staticmethod
-    def delete_article(db: Session, article_id: str, tenant_id: str):
-        article = KnowledgeArticles.get_by_id(
+    async def delete_article(db: AsyncSession, article_id: str, tenant_id: str):
+        article = await KnowledgeArticles.get_by_id(
             session=db, obj_id=article_id, tenant_id=tenant_id
         )
         if not article:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="Article not found."
             )
-        article.delete(session=db)
+        await article.delete(session=db)
+        replica_router.mark_written(_tenant_key(tenant_id))
+        await article_cache.invalidate(_article_cache_key(tenant_id, article_id))
         return article
@@ -0,0 +1,129 @@
+import json
+from datetime import datetime
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+PAGE_SIZE = 100
+
+PageCall = Callable[[Callable[[], Awaitable[Any]]], Awaitable[Any]]
+
+
+async def _direct(fn: Callable[[], Awaitable[Any]]) -> Any:
+    return await fn()
+
+
+class LocalPolicy:
+    """In-process evaluator for the app's tenant-scoped RBAC model.
+
+    Roles and role assignments are pulled from Permit (or a JSON file) and
+    compiled into a (user, tenant) -> {"resource:action"} lookup table, so a
+    decision is a set membership test.
+    """
+
+    def __init__(self):
+        self.role_permissions: Dict[str, FrozenSet[str]] = {}
+        self.assignments: Dict[Tuple[str, str], Set[str]] = {}
+        self.grants: Dict[Tuple[str, str], FrozenSet[str]] = {}
+        self.loaded_at: Optional[datetime] = None
+        self.shadow_matches = 0
+        self.shadow_mismatches = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self.loaded_at is not None
+
+    def compile(self, roles: Iterable[dict], assignments: Iterable[dict]) -> None:
+        """Build the lookup table from role and role assignment records."""
+        definitions = {role["key"]: role for role in roles}
+
+        def resolve(key: str, seen: FrozenSet[str] = frozenset()) -> Set[str]:
+            role = definitions.get(key)
+            if role is None or key in seen:
+                return set()
+            permissions = set(role.get("permissions") or [])
+            for parent in role.get("extends") or []:
+                permissions |= resolve(parent, seen | {key})
+            return permissions
+
+        role_permissions = {key: frozenset(resolve(key)) for key in definitions}
+
+        assigned: Dict[Tuple[str, str], Set[str]] = {}
+        for assignment in assignments:
+            if assignment.get("tenant") is None:
+                continue
+            pair = (assignment["user"], assignment["tenant"])
+            assigned.setdefault(pair, set()).add(assignment["role"])
+
+        self.role_permissions = role_permissions
+        self.assignments = assigned
+        self.grants = {
+            pair: self._grants_for(roles) for pair, roles in assigned.items()
+        }
+        self.loaded_at = datetime.utcnow()
+
+    def _grants_for(self, roles: Iterable[str]) -> FrozenSet[str]:
+        granted: Set[str] = set()
+        for role in roles:
+            granted |= self.role_permissions.get(role, frozenset())
+        return frozenset(granted)
+
+    def assign(self, user_id: str, tenant_id: str, role: str) -> None:
+        """Mirror a role assignment made through the app without a full reload."""
+        pair = (user_id, tenant_id)
+        self.assignments.setdefault(pair, set()).add(role)
+        self.grants[pair] = self._grants_for(self.assignments[pair])
+
+    def check(
+        self, user_id: str, action: str, resource: str, tenant_id: str
+    ) -> Optional[bool]:
+        """Return the local decision, or None if no policy has been loaded."""
+        if not self.loaded:
+            return None
+        return f"{resource}:{action}" in self.grants.get((user_id, tenant_id), ())
+
+    def load_from_file(self, path: str) -> None:
+        """Load {"roles": [...], "role_assignments": [...]} from a JSON file."""
+        with open(path) as policy_file:
+            data = json.load(policy_file)
+        self.compile(data.get("roles", []), data.get("role_assignments", []))
+
+    async def load_from_permit(self, client, call: PageCall = _direct) -> None:
+        """Pull every role and role assignment through the Permit API client.
+
+        Each page request is made through call, e.g. to give every page its
+        own deadline rather than one for the whole load.
+        """
+        roles = await _fetch_all(client.roles.list, call)
+        assignments = await _fetch_all(client.role_assignments.list, call)
+        self.compile(
+            [role.dict() for role in roles],
+            [assignment.dict() for assignment in assignments],
+        )
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "loaded_at": self.loaded_at.isoformat() if self.loaded_at else None,
+            "assignments": len(self.assignments),
+            "shadow_matches": self.shadow_matches,
+            "shadow_mismatches": self.shadow_mismatches,
+        }
+
+
+async def _fetch_all(list_page, call: PageCall) -> List:
+    items, page = [], 1
+    while True:
+        batch = await call(lambda: list_page(page=page, per_page=PAGE_SIZE))
+        items.extend(batch)
+        if len(batch) < PAGE_SIZE:
+            return items
+        page += 1
@@ -0,0 +1,164 @@
+import asyncio
+from datetime import timedelta
+from typing import List, Optional
+from fastapi.logger import logger
+from permit import PermitApiError
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .. import settings
+from ..database import SessionLocal
+from ..models import PermitOutbox
+from ..utils.resilience import backoff_delay
+from .permit_service import sync_tenants, sync_users
+
+TENANT_CREATED = "tenant_created"
+USER_CREATED = "user_created"
+
+
+class PermitOutboxService:
+
+    @staticmethod
+    def tenant_event(tenant_id, name: str, description: Optional[str]) -> dict:
+        return {
+            "kind": TENANT_CREATED,
+            "payload": {
+                "key": str(tenant_id),
+                "name": name,
+                "description": description,
+            },
+            "idempotency_key": f"tenant:{tenant_id}",
+        }
+
+    @staticmethod
+    def user_event(user_id, tenant_id, role: str, email: Optional[str] = None) -> dict:
+        payload = {"user": str(user_id), "role": role, "tenant": str(tenant_id)}
+        if email is not None:
+            # Attributes for the Permit user, used only if it doesn't exist yet
+            payload["profile"] = {"email": email}
+        return {
+            "kind": USER_CREATED,
+            "payload": payload,
+            "idempotency_key": f"user:{user_id}:{tenant_id}:{role}",
+        }
+
+    @staticmethod
+    async def enqueue(db: AsyncSession, *events: dict) -> None:
+        """Queue Permit changes in the caller's transaction, in one statement;
+        they are only delivered if that transaction commits. Repeated
+        idempotency keys are ignored."""
+        await db.execute(
+            insert(PermitOutbox)
+            .values(list(events))
+            .on_conflict_do_nothing(index_elements=[PermitOutbox.idempotency_key])
+        )
+
+    @staticmethod
+    async def dispatch_batch(db: AsyncSession) -> int:
+        """Push one batch of due events to Permit; returns how many were claimed.
+
+        Rows are claimed with SKIP LOCKED so several workers can dispatch
+        concurrently. Tenants go first since role assignments refer to them.
+        """
+        result = await db.scalars(
+            select(PermitOutbox)
+            .where(
+                PermitOutbox.processed_at.is_(None),
+                PermitOutbox.failed_at.is_(None),
+                PermitOutbox.available_at <= func.now(),
+            )
+            .order_by(PermitOutbox.created_at)
+            .limit(settings.permit_outbox_batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        events = list(result.all())
+        if not events:
+            await db.rollback()
+            return 0
+
+        tenants = [event for event in events if event.kind == TENANT_CREATED]
+        await _push(tenants, sync_tenants)
+        # Role assignments can't succeed before their tenant exists in Permit
+        pending_tenants = {
+            event.payload["key"] for event in tenants if event.processed_at is None
+        }
+        users = []
+        for event in events:
+            if event.kind != USER_CREATED:
+                continue
+            if event.payload["tenant"] in pending_tenants:
+                event.available_at = func.now() + timedelta(
+                    seconds=settings.permit_outbox_backoff_base_seconds
+                )
+            else:
+                users.append(event)
+        await _push(users, sync_users)
+
+        await db.commit()
+        return len(events)
+
+
+async def _push(events: List[PermitOutbox], sync) -> None:
+    """Push events with one sync call. If Permit rejects the batch, push them
+    one at a time so a single bad event doesn't hold back the others."""
+    if not events:
+        return
+    try:
+        await sync([event.payload for event in events])
+        _mark_processed(events)
+        return
+    except PermitApiError as e:
+        if e.status_code >= 500 or len(events) == 1:
+            logger.error("Pushing outbox events to Permit failed", exc_info=e)
+            _reschedule(events, e)
+            return
+    except Exception as e:
+        logger.error("Pushing outbox events to Permit failed", exc_info=e)
+        _reschedule(events, e)
+        return
+
+    for event in events:
+        try:
+            await sync([event.payload])
+            _mark_processed([event])
+        except Exception as e:
+            logger.error(f"Permit rejected outbox event {event.idempotency_key}: {e}")
+            _reschedule([event], e)
+
+
+def _mark_processed(events: List[PermitOutbox]) -> None:
+    for event in events:
+        event.processed_at = func.now()
+
+
+def _reschedule(events: List[PermitOutbox], error: Exception) -> None:
+    for event in events:
+        event.attempts += 1
+        event.last_error = str(error)[:1000]
+        if event.attempts >= settings.permit_outbox_max_attempts:
+            event.failed_at = func.now()
+            logger.error(
+                f"Outbox event {event.idempotency_key} failed after "
+                f"{event.attempts} attempts and will not be retried: {error}"
+            )
+            continue
+        delay = backoff_delay(
+            event.attempts,
+            settings.permit_outbox_backoff_base_seconds,
+            settings.permit_outbox_backoff_cap_seconds,
+        )
+        event.available_at = func.now() + timedelta(seconds=delay)
+
+
+async def run_outbox_dispatcher() -> None:
+    """Background task draining the outbox; sleeps only when it is caught up."""
+    while True:
+        try:
+            async with SessionLocal() as db:
+                claimed = await PermitOutboxService.dispatch_batch(db)
+        except Exception as e:
+            logger.error("Outbox dispatcher iteration failed", exc_info=e)
+            claimed = 0
+        if claimed < settings.permit_outbox_batch_size:
+            await asyncio.sleep(settings.permit_outbox_poll_seconds)
@@ -1,17 +1,24 @@
-from typing import Optional
+import asyncio
+from typing import List, Optional, Tuple
 from fastapi import HTTPException, status
 from fastapi.logger import logger
 from permit import (
     Permit,
-    TenantRead,
-    UserRead,
     RoleAssignmentRead,
     PermitApiError,
+    PermitConnectionError,
 )
 from enum import Enum
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
 
 from .. import settings
-
+from ..database import SessionLocal
+from ..models import PermitOutbox
+from ..utils.cache import SingleFlight, TTLCache
+from ..utils.resilience import CircuitBreaker, CircuitOpenError, call_with_retries
+from ..utils.instrumentation import span
+from .local_policy import LocalPolicy
 
 permit = Permit(
     pdp=settings.permit_pdp,
@@ -19,6 +26,42 @@ permit = Permit(
 )
 permit_client = permit.api
 
+# Local cache of PDP decisions keyed on (user_id, action, resource, tenant_id)
+decision_cache = TTLCache(
+    maxsize=settings.permit_cache_size, ttl=settings.permit_cache_ttl_seconds
+)
+_inflight_checks = SingleFlight()
+# Bumped on every invalidation so in-flight checks don't cache stale decisions
+_invalidations = 0
+# Outlives decision_cache; consulted only while the PDP is unavailable
+last_known_decisions = TTLCache(
+    maxsize=settings.permit_cache_size,
+    ttl=settings.permit_last_known_ttl_seconds,
+)
+
+pdp_breaker = CircuitBreaker(
+    "permit-pdp",
+    failure_threshold=settings.permit_breaker_failure_threshold,
+    reset_timeout=settings.permit_breaker_reset_seconds,
+)
+api_breaker = CircuitBreaker(
+    "permit-api",
+    failure_threshold=settings.permit_breaker_failure_threshold,
+    reset_timeout=settings.permit_breaker_reset_seconds,
+)
+policy_refresh_breaker = CircuitBreaker(
+    "permit-policy-refresh",
+    failure_threshold=settings.permit_breaker_failure_threshold,
+    reset_timeout=settings.permit_breaker_reset_seconds,
+)
+
+# Role matrix and assignments compiled for in-process decisions, see
+# PERMIT_DECISION_MODE
+local_policy = LocalPolicy()
+
+# Errors meaning Permit could not answer, as opposed to answering "no"
+UNAVAILABLE_ERRORS = (CircuitOpenError, asyncio.TimeoutError, PermitConnectionError)
+
 
 class Actions(Enum):
     CREATE = "create"
@@ -29,29 +72,79 @@ class Actions(Enum):
     ASSIGN_ROLE = "assign_role"
 
 
-async def create_permit_user(user_id: str, tenant_id: str, role: str):
-    """Create a user"""
-    try:
+def _is_unavailable(error: BaseException) -> bool:
+    if isinstance(error, PermitApiError):
+        return error.status_code >= 500
+    return isinstance(error, UNAVAILABLE_ERRORS)
 
-        new_user: UserRead = await permit_client.users.sync({"key": user_id})
-        await permit_client.users.assign_role(
-            {"user": user_id, "role": role, "tenant": tenant_id}
-        ),
 
-    except PermitApiError as e:
-        logger.error(msg=e, stack_info=True)
-        if e.status_code == 409:
-            raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT,
-                detail="A user with this key already exists",
+async def _call_permit(fn, breaker: CircuitBreaker, idempotent: bool = True):
+    """Call Permit with a deadline, circuit breaker and, if safe, retries."""
+    with span("permit"):
+        return await call_with_retries(
+            fn,
+            breaker=breaker,
+            timeout=settings.permit_timeout_seconds,
+            retries=settings.permit_retries if idempotent else 0,
+            backoff_base=settings.permit_backoff_base_seconds,
+            backoff_cap=settings.permit_backoff_cap_seconds,
+            transient=(asyncio.TimeoutError, PermitConnectionError, PermitApiError),
+            is_failure=_is_unavailable,
+        )
+
+
+def _service_unavailable() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authorization service is unavailable. Please retry shortly.",
+    )
+
+
+def _degraded_decision(cache_key: tuple) -> bool:
+    """Decide without the PDP according to the action's degraded-mode policy."""
+    user_id, action, _, _ = cache_key
+    policy = settings.permit_degraded_policy.get(action, "closed")
+    logger.warning(f"Permit unavailable; applying '{policy}' policy to {action}")
+
+    if policy == "open":
+        return True
+    if policy == "last_known":
+        decision = last_known_decisions.get(cache_key)
+        if decision is not None:
+            return decision
+    raise _service_unavailable()
+
+
+async def _assignments_pending(user_id: str) -> bool:
+    """Whether role assignments of the user are still waiting in the outbox.
+
+    The PDP denies such a user until they are pushed, so those denies must not
+    be cached: other workers would keep answering them after the push.
+    """
+    try:
+        async with SessionLocal() as db:
+            pending = await db.scalar(
+                select(PermitOutbox.id)
+                .where(
+                    PermitOutbox.idempotency_key.startswith(f"user:{user_id}:"),
+                    PermitOutbox.processed_at.is_(None),
+                    PermitOutbox.failed_at.is_(None),
+                )
+                .limit(1)
             )
+    except SQLAlchemyError as e:
+        logger.error("Checking the Permit outbox failed", exc_info=e)
+        return True
+    return pending is not None
 
-        raise HTTPException(
-            status_code=e.status_code,
-            detail=e.message,
-        )
 
-    return new_user
+def _cache_decision(cache_key: tuple, permitted: bool) -> None:
+    decision_cache.set(
+        cache_key,
+        permitted,
+        ttl=None if permitted else settings.permit_cache_negative_ttl_seconds,
+    )
+    last_known_decisions.set(cache_key, permitted)
 
 
 async def check_user_permission(
@@ -61,45 +154,244 @@ async def check_user_permission(
     resource: str = "article",
 ) -> bool:
     """Checks if user has the right permission to access resource."""
+    if settings.permit_decision_mode == "local":
+        decision = local_policy.check(user_id, action, resource, tenant_id)
+        if decision is not None:
+            return decision
+
+    cache_key = (user_id, action, resource, tenant_id)
+    cached = decision_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    # Concurrent identical checks share a single PDP request
+    return await _inflight_checks.do(
+        cache_key, lambda: _check_with_pdp(cache_key, _invalidations)
+    )
+
+
+async def _check_with_pdp(cache_key: tuple, generation: int) -> bool:
+    user_id, action, resource, tenant_id = cache_key
     try:
-        return await permit.check(
-            {"key": user_id}, action, {"type": resource, "tenant": tenant_id}
+        permitted = await _call_permit(
+            lambda: permit.check(
+                {"key": user_id}, action, {"type": resource, "tenant": tenant_id}
+            ),
+            pdp_breaker,
         )
+    except UNAVAILABLE_ERRORS:
+        return _degraded_decision(cache_key)
     except PermitApiError as e:
+        if _is_unavailable(e):
+            return _degraded_decision(cache_key)
         logger.error(f"Permission check failed for user {user_id}", exc_info=e)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.message,
         )
 
+    # Skip caching when a role change raced with this request, or a deny may
+    # only mean the user's assignments haven't reached Permit yet
+    if generation == _invalidations and (
+        permitted or not await _assignments_pending(user_id)
+    ):
+        _cache_decision(cache_key, permitted)
+    if settings.permit_decision_mode == "shadow":
+        _compare_with_local(cache_key, permitted)
+    return permitted
 
-async def create_tenant(name: str, tenant_id: str, description: Optional[str]):
-    """Creates a tenant"""
-    try:
-        tenant: TenantRead = await permit_client.tenants.create(
-            {"key": tenant_id, "name": name, "description": description}
+
+def _compare_with_local(cache_key: tuple, permitted: bool) -> None:
+    local_decision = local_policy.check(*cache_key)
+    if local_decision is None:
+        return
+    if local_decision == permitted:
+        local_policy.shadow_matches += 1
+    else:
+        local_policy.shadow_mismatches += 1
+        logger.warning(
+            f"Local policy disagrees with PDP for {cache_key}: "
+            f"local={local_decision} pdp={permitted}"
         )
-        return tenant
 
+
+async def check_user_permissions(
+    user_id: str,
+    tenant_id: str,
+    checks: List[Tuple[str, str]],
+) -> List[bool]:
+    """Checks several (action, resource) pairs for a user in one PDP call.
+
+    Decisions already cached are answered locally; only the rest are sent to
+    the PDP. Results are returned in the order of checks.
+    """
+    decisions: List[Optional[bool]] = []
+    missing: List[int] = []
+    use_local = settings.permit_decision_mode == "local" and local_policy.loaded
+    for index, (action, resource) in enumerate(checks):
+        if use_local:
+            decisions.append(local_policy.check(user_id, action, resource, tenant_id))
+            continue
+        decisions.append(decision_cache.get((user_id, action, resource, tenant_id)))
+        if decisions[-1] is None:
+            missing.append(index)
+
+    if missing:
+        generation = _invalidations
+        queries = [
+            {
+                "user": {"key": user_id},
+                "action": checks[index][0],
+                "resource": {"type": checks[index][1], "tenant": tenant_id},
+            }
+            for index in missing
+        ]
+        try:
+            results = await _call_permit(
+                lambda: permit.bulk_check(queries), pdp_breaker
+            )
+        except (*UNAVAILABLE_ERRORS, PermitApiError) as e:
+            if isinstance(e, PermitApiError) and not _is_unavailable(e):
+                logger.error(
+                    f"Bulk permission check failed for user {user_id}", exc_info=e
+                )
+                raise HTTPException(
+                    status_code=e.status_code,
+                    detail=e.message,
+                )
+            for index in missing:
+                action, resource = checks[index]
+                decisions[index] = _degraded_decision(
+                    (user_id, action, resource, tenant_id)
+                )
+            return decisions
+
+        for index, permitted in zip(missing, results):
+            decisions[index] = permitted
+        cache_denies = all(results) or not await _assignments_pending(user_id)
+        for index, permitted in zip(missing, results):
+            if generation == _invalidations and (permitted or cache_denies):
+                action, resource = checks[index]
+                _cache_decision((user_id, action, resource, tenant_id), permitted)
+
+    return decisions
+
+
+def invalidate_user_permissions(user_id: str, tenant_id: Optional[str] = None):
+    """Drop cached decisions for a user, optionally limited to one tenant."""
+    global _invalidations
+    _invalidations += 1
+
+    def matches(key):
+        return key[0] == user_id and (tenant_id is None or key[3] == tenant_id)
+
+    last_known_decisions.delete_where(matches)
+    return decision_cache.delete_where(matches)
+
+
+def invalidate_tenant_permissions(tenant_id: str):
+    """Drop every cached decision scoped to a tenant."""
+    global _invalidations
+    _invalidations += 1
+    last_known_decisions.delete_where(lambda key: key[3] == tenant_id)
+    return decision_cache.delete_where(lambda key: key[3] == tenant_id)
+
+
+async def _create_missing(bulk_create, create, items: List[dict]) -> None:
+    """Create items in bulk; ones that already exist are left untouched."""
+    try:
+        await _call_permit(lambda: bulk_create(items), api_breaker, idempotent=False)
     except PermitApiError as e:
-        logger.error(msg=e, stack_info=True)
-        raise HTTPException(
-            status_code=e.status_code,
-            detail=e.message,
+        if e.status_code != 409:
+            raise
+        # An earlier attempt got some of them through; create the rest one by one
+        for item in items:
+            try:
+                await _call_permit(lambda: create(item), api_breaker, idempotent=False)
+            except PermitApiError as ex:
+                if ex.status_code != 409:
+                    raise
+
+
+async def sync_tenants(tenants: List[dict]) -> None:
+    """Create tenants in Permit; tenants that already exist count as synced."""
+    await _create_missing(
+        permit_client.tenants.bulk_create, permit_client.tenants.create, tenants
+    )
+
+
+async def sync_users(assignments: List[dict]) -> None:
+    """Create users and assign their {"user", "role", "tenant"} roles in Permit.
+
+    Users that already exist keep the attributes they have in Permit, and
+    role assignments are idempotent, so a batch can safely be pushed again.
+    """
+    users = {}
+    for assignment in assignments:
+        users.setdefault(
+            assignment["user"],
+            {"key": assignment["user"], **assignment.get("profile", {})},
+        )
+    await _create_missing(
+        permit_client.users.bulk_create,
+        permit_client.users.create,
+        list(users.values()),
+    )
+    await _call_permit(
+        lambda: permit_client.role_assignments.bulk_assign(
+            [
+                {key: assignment[key] for key in ("user", "role", "tenant")}
+                for assignment in assignments
+            ]
+        ),
+        api_breaker,
+    )
+    for assignment in assignments:
+        invalidate_user_permissions(assignment["user"], assignment["tenant"])
+        local_policy.assign(
+            assignment["user"], assignment["tenant"], assignment["role"]
         )
 
 
 async def update_user_role(user_id: str, tenant_id: str, role: str):
     """update user role"""
     try:
-        role_assignment: RoleAssignmentRead = await permit_client.users.assign_role(
-            user_id, role, tenant_id
+        role_assignment: RoleAssignmentRead = await _call_permit(
+            lambda: permit_client.users.assign_role(user_id, role, tenant_id),
+            api_breaker,
         )
+        invalidate_user_permissions(user_id, tenant_id)
+        local_policy.assign(user_id, tenant_id, role)
         return role_assignment
 
+    except UNAVAILABLE_ERRORS:
+        raise _service_unavailable()
     except PermitApiError as e:
         logger.error(msg=e, stack_info=True)
         raise HTTPException(
             status_code=e.status_code,
             detail=e.message,
         )
+
+
+async def refresh_local_policy() -> None:
+    """Reload the local policy from PERMIT_LOCAL_POLICY_FILE or the Permit API."""
+    if settings.permit_local_policy_file:
+        local_policy.load_from_file(settings.permit_local_policy_file)
+    else:
+        # Deadline per page, and a breaker of its own so a slow refresh can't
+        # open the circuit live permission checks depend on
+        await local_policy.load_from_permit(
+            permit_client, call=lambda fn: _call_permit(fn, policy_refresh_breaker)
+        )
+
+
+async def keep_local_policy_fresh() -> None:
+    """Background task reloading the local policy on a fixed interval."""
+    while True:
+        try:
+            await refresh_local_policy()
+        except Exception as e:
+            # Keep serving the previously compiled policy
+            logger.error("Refreshing the local policy failed", exc_info=e)
+        await asyncio.sleep(settings.permit_local_policy_refresh_seconds)
@@ -1,43 +1,112 @@
+from typing import Tuple
 from fastapi import Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from uuid import UUID
-
-from ..utils.session import get_db
-from ..schemas.users import UserCreate
-from ..utils.auth_utils import (
-    get_password_hash,
-    verify_access_token,
-    verify_password,
-    oauth2_scheme,
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from uuid import UUID, uuid4
+
+from .. import settings
+from ..database import read_replica, replica_router
+from ..utils.cache import TTLCache
+from ..utils.session import get_db, release_connection
+from ..schemas.users import PrincipalSchema, UserCreate
+from ..utils.auth_utils import decode_token, oauth2_scheme
+from ..utils.hashing import hash_password, verify_and_update_password
+from ..models.users import Users, UserRoles, user_tenants
+from ..models.tenants import Tenants
+from . import update_user_role
+from .permit_outbox import PermitOutboxService
+
+UNIQUE_VIOLATION = "23505"
+
+# Authenticated principals keyed by token subject (the user's email)
+principal_cache = TTLCache(
+    maxsize=settings.principal_cache_size, ttl=settings.principal_cache_ttl_seconds
 )
-from ..models.users import Users
-from . import create_permit_user
+
+
+def invalidate_principal(email: str) -> None:
+    """Forget the cached principal so the next request reloads the user."""
+    principal_cache.delete(email)
+    replica_router.mark_written(_user_key(email))
+
+
+def _user_key(email: str) -> str:
+    # Read-your-writes: lookups of a user stay on the primary after it changes
+    return f"user:{email}"
 
 
 class UserService:
 
     @staticmethod
-    async def create_user(db: Session, user: UserCreate, tenant_id: UUID) -> Users:
-        """Static method to create a new user in the database."""
-        hashed_password = get_password_hash(user.password)
-        new_user = Users(
-            email=user.email,
-            password_hash=hashed_password,
-            active_workspace=tenant_id,
-            workspaces=[tenant_id],
-            role=user.role,
-        )
-        new_user.add(new_user, db)
-        new_user.save(db)
+    async def register(
+        db: AsyncSession, user: UserCreate, tenant_name: str, tenant_description: str
+    ) -> Tuple[Users, Tenants]:
+        """Create a user with its own default tenant in a single transaction.
 
-        await create_permit_user(
-            str(new_user.id), str(new_user.active_workspace), user.role.value
-        )
-        return new_user
+        Rows are inserted with RETURNING so nothing has to be refreshed, and a
+        taken email is detected by the unique index instead of a pre-check.
+        """
+        hashed_password = await hash_password(user.password)
+        user_id, tenant_id = uuid4(), uuid4()
+        try:
+            # Tenants.owner references users, so the user goes in first
+            new_user = await db.scalar(
+                insert(Users)
+                .values(
+                    id=user_id,
+                    email=user.email,
+                    password_hash=hashed_password,
+                    active_workspace=tenant_id,
+                    workspaces=[tenant_id],
+                    role=user.role,
+                )
+                .returning(Users)
+            )
+            new_tenant = await db.scalar(
+                insert(Tenants)
+                .values(
+                    id=tenant_id,
+                    name=tenant_name,
+                    description=tenant_description,
+                    owner=user_id,
+                )
+                .returning(Tenants)
+            )
+            await db.execute(
+                insert(user_tenants).values(user_id=user_id, tenant_id=tenant_id)
+            )
+            # Synced to Permit by the outbox dispatcher once this commits
+            await PermitOutboxService.enqueue(
+                db,
+                PermitOutboxService.tenant_event(
+                    tenant_id, tenant_name, tenant_description
+                ),
+                PermitOutboxService.user_event(
+                    user_id, tenant_id, user.role.value, email=user.email
+                ),
+            )
+            await db.commit()
+        except IntegrityError as ex:
+            await db.rollback()
+            if getattr(ex.orig, "sqlstate", None) == UNIQUE_VIOLATION and (
+                "email" in str(ex.orig)
+            ):
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="User already exists.",
+                )
+            raise ex
+        except Exception as ex:
+            await db.rollback()
+            raise ex
+        replica_router.mark_written(_user_key(user.email))
+
+        return new_user, new_tenant
 
     @staticmethod
-    def get_user_by_id(db: Session, id: UUID, tenant_id: UUID) -> Users:
-        user = Users.get_by_id(db, id, tenant_id)
+    async def get_user_by_id(db: AsyncSession, id: UUID, tenant_id: UUID) -> Users:
+        user = await Users.get_by_id(db, id, tenant_id)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, detail="User not found."
@@ -45,45 +114,116 @@ class UserService:
         return user
 
     @staticmethod
-    def get_user_by_email(db: Session, email: str) -> Users:
-        """Fetch a user by email."""
-        return Users.get_one_by(db, email=email)
+    async def get_user_by_email(db: AsyncSession, email: str) -> Users:
+        """Fetch a user by email, from a replica unless it changed recently."""
+        result = await db.execute(
+            select(Users)
+            .filter_by(email=email)
+            .limit(1)
+            .execution_options(**read_replica(_user_key(email)))
+        )
+        return result.scalars().first()
 
     @staticmethod
-    def authenticate_user(db: Session, email: str, password: str) -> Users:
+    async def authenticate_user(db: AsyncSession, email: str, password: str) -> Users:
         """Authenticate a user by email and password."""
-        user = UserService.get_user_by_email(db, email)
-        if not user or not verify_password(password, user.password_hash):
+        user = await UserService.get_user_by_email(db, email)
+        if not user:
             return None
+
+        valid, new_hash = await verify_and_update_password(password, user.password_hash)
+        if not valid:
+            return None
+        if new_hash:
+            # Stored hash predates the current CryptContext settings
+            user.update(password_hash=new_hash)
+            await user.save(db)
         return user
 
     @staticmethod
-    def get_current_user(token: str, db: Session):
+    def principal_claims(user: Users) -> dict:
+        """Claims to sign into access tokens so requests can skip the lookup."""
+        return {
+            "sub": user.email,
+            "uid": str(user.id),
+            "ws": str(user.active_workspace),
+            "role": user.role.value,
+            "active": user.is_active,
+        }
+
+    @staticmethod
+    async def get_current_user(token: str, db: AsyncSession) -> PrincipalSchema:
         credentials_exception = HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
-        username = verify_access_token(token, credentials_exception)
-        user = UserService.get_user_by_email(db, username)
-        if user is None:
-            raise credentials_exception
+        claims = decode_token(token, credentials_exception)
+        username = claims["sub"]
+
+        if settings.trust_token_claims and "uid" in claims:
+            return PrincipalSchema(
+                id=claims["uid"],
+                email=username,
+                active_workspace=claims["ws"],
+                role=claims["role"],
+                is_active=claims["active"],
+            )
+
+        principal = principal_cache.get(username)
+        if principal is None:
+            user = await UserService.get_user_by_email(db, username)
+            if user is None:
+                raise credentials_exception
+            principal = PrincipalSchema.model_validate(user)
+            principal_cache.set(username, principal)
+        return principal
+
+    @staticmethod
+    async def update_user_password(
+        db: AsyncSession, password: str, id: UUID, tenant_id: UUID
+    ) -> Users:
+        hashed_password = await hash_password(password)
+        user = await UserService.get_user_by_id(db, id, tenant_id)
+        user.update(password_hash=hashed_password)
+        await user.save(db)
+        invalidate_principal(user.email)
+        return user
+
+    @staticmethod
+    async def update_role(
+        db: AsyncSession, id: UUID, tenant_id: UUID, role: UserRoles
+    ) -> Users:
+        user = await UserService.get_user_by_id(db, id, tenant_id)
+        user.update(role=role)
+        await user.save(db)
+        invalidate_principal(user.email)
+
+        await update_user_role(str(user.id), str(tenant_id), role.value)
         return user
 
     @staticmethod
-    def update_user_password(
-        db: Session, password: str, id: UUID, tenant_id: UUID
+    async def switch_workspace(
+        db: AsyncSession, id: UUID, tenant_id: UUID, workspace_id: UUID
     ) -> Users:
-        hashed_password = get_password_hash(password)
-        user = UserService.get_user_by_id(db, id, tenant_id)
-        user.update(db, password_hash=hashed_password)
+        user = await UserService.get_user_by_id(db, id, tenant_id)
+        try:
+            user.set_active_workspace(workspace_id)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
+        await user.save(db)
+        invalidate_principal(user.email)
         return user
 
 
 # Wrapper for dependency injection
-def get_current_user_dep(
+async def get_current_user_dep(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
 
-    return UserService.get_current_user(token, db)
+    principal = await UserService.get_current_user(token, db)
+    if settings.db_release_before_permit:
+        # Routes check permissions with Permit next; don't hold a connection
+        await release_connection(db)
+    return principal
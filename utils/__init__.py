@@ -4,8 +4,9 @@ from .exception_handler import (
     validation_exception_handler,
 )
 from .auth_utils import (
-    blacklisted_tokens,
+    revocation_store,
+    revoke_token,
     verify_access_token,
     verify_password,
-    verify_token_blacklist,
+    TokenRevocationMiddleware,
 )
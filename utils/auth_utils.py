@@ -1,21 +1,32 @@
+import hashlib
 from datetime import datetime, timedelta
-from typing import Dict
-from fastapi import Request
+from typing import Optional, Tuple
+from uuid import uuid4
 from fastapi.responses import JSONResponse
 from fastapi.security import OAuth2PasswordBearer
 from passlib.context import CryptContext
 import jwt
 from jwt.exceptions import PyJWTError
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 from .. import settings
+from .revocation import build_revocation_store
 
 
-# Context for password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Context for password hashing; hashes below the configured cost are
+# reported by verify_and_update so they can be upgraded on login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.bcrypt_rounds,
+    bcrypt__min_rounds=settings.bcrypt_rounds,
+)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login", auto_error=False)
-blacklisted_tokens: Dict[str, datetime] = {}
+revocation_store = build_revocation_store(
+    settings.token_revocation_backend, settings.redis_url
+)
 
 
 # Function to hash password
@@ -33,7 +44,7 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None) -> s
     expire = datetime.utcnow() + (
         expires_delta or timedelta(minutes=settings.access_token_expire_minutes)
     )
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "jti": uuid4().hex})
 
     encoded_jwt = jwt.encode(
         to_encode, settings.secret_key, algorithm=settings.algorithm
@@ -47,7 +58,7 @@ def create_refresh_token(data: dict, expires_delta: timedelta | None = None) ->
     expire = datetime.utcnow() + (
         expires_delta or timedelta(days=settings.refresh_token_expire_days)
     )
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "jti": uuid4().hex})
 
     encoded_jwt = jwt.encode(
         to_encode, settings.secret_key, algorithm=settings.algorithm
@@ -55,27 +66,78 @@ def create_refresh_token(data: dict, expires_delta: timedelta | None = None) ->
     return encoded_jwt
 
 
-def verify_access_token(token: str, credentials_exception):
-    """Verifies Access and Refresh tokens"""
+def decode_token(token: str, credentials_exception) -> dict:
+    """Verifies a token and returns its claims"""
     try:
         payload = jwt.decode(
             token, settings.secret_key, algorithms=[settings.algorithm]
         )
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-        return email
     except PyJWTError:
         raise credentials_exception
+    if payload.get("sub") is None:
+        raise credentials_exception
+    return payload
 
 
-async def verify_token_blacklist(request: Request, call_next):
-    token = request.headers.get("Authorization", "").replace("Bearer ", "")
-    if token in blacklisted_tokens:
-        return JSONResponse(
-            status_code=401,
-            content={"message": "Token is revoked.", "status": "fail", "data": {}},
-        )
+def verify_access_token(token: str, credentials_exception):
+    """Verifies Access and Refresh tokens"""
+    return decode_token(token, credentials_exception)["sub"]
 
-    response = await call_next(request)
-    return response
+
+def get_revocation_claims(token: str) -> Optional[Tuple[str, datetime]]:
+    """Return the (jti, expiry) used to revoke a token, or None if invalid."""
+    try:
+        payload = jwt.decode(
+            token, settings.secret_key, algorithms=[settings.algorithm]
+        )
+    except PyJWTError:
+        return None
+    # Tokens issued before jti was added are keyed on their digest instead
+    jti = payload.get("jti") or hashlib.sha256(token.encode()).hexdigest()
+    return jti, datetime.utcfromtimestamp(payload["exp"])
+
+
+async def revoke_token(token: str) -> bool:
+    """Revoke a token until it expires; returns False if it is not valid."""
+    claims = get_revocation_claims(token)
+    if claims is None:
+        return False
+    await revocation_store.revoke(*claims)
+    return True
+
+
+class TokenRevocationMiddleware:
+    """Rejects requests carrying a revoked bearer token.
+
+    Written as plain ASGI so that allowed requests are handed to the app
+    untouched, without the task and body-stream wrapping of
+    BaseHTTPMiddleware.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            token = _bearer_token(scope)
+            claims = get_revocation_claims(token) if token else None
+            if claims and await revocation_store.is_revoked(claims[0]):
+                response = JSONResponse(
+                    status_code=401,
+                    content={
+                        "message": "Token is revoked.",
+                        "status": "fail",
+                        "data": {},
+                    },
+                )
+                await response(scope, receive, send)
+                return
+
+        await self.app(scope, receive, send)
+
+
+def _bearer_token(scope: Scope) -> Optional[str]:
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            return value.decode("latin-1").replace("Bearer ", "")
+    return None
@@ -0,0 +1,198 @@
+import asyncio
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # pragma: no cover - optional dependency
+    redis = None
+
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Bounded, in-process LRU cache whose entries expire after a TTL.
+
+    Each entry may carry its own TTL, so callers can keep e.g. negative
+    results for a shorter time than positive ones.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key, or default if missing/expired."""
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store value under key, evicting the least recently used entry."""
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        """Remove a single key if present."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Remove every key matching predicate; returns the number removed."""
+        with self._lock:
+            stale = [key for key in self._data if predicate(key)]
+            for key in stale:
+                del self._data[key]
+            return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+
+class SingleFlight:
+    """Coalesces concurrent calls for the same key onto one in-flight call.
+
+    The call runs in its own task, so a cancelled caller (e.g. a client that
+    disconnected) neither cancels it nor fails the others waiting on it.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, "asyncio.Task"] = {}
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: "asyncio.Task") -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved when nobody is waiting any more
+
+
+class RedisCacheTier:
+    """Cache tier kept in Redis so every worker sees the same entries."""
+
+    def __init__(self, url: str, prefix: str, ttl: float):
+        if redis is None:
+            raise RuntimeError("The shared cache tier requires the 'redis' package.")
+        self.client = redis.from_url(url)
+        self.prefix = prefix
+        self.ttl = ttl
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(self.prefix + key)
+
+    async def set(self, key: str, value: bytes) -> None:
+        await self.client.set(self.prefix + key, value, ex=int(self.ttl))
+
+    async def delete(self, key: str) -> None:
+        await self.client.delete(self.prefix + key)
+
+
+class ReadThroughCache:
+    """Async read-through cache with an in-process LRU tier and an optional
+    shared tier.
+
+    Concurrent misses for the same key are coalesced onto a single load, and
+    loads that overlap an invalidation are not written back, so a write can
+    not be shadowed by the stale value of a read that started before it.
+    """
+
+    def __init__(
+        self,
+        local: TTLCache,
+        shared: Optional[RedisCacheTier] = None,
+        dumps: Callable[[Any], bytes] = None,
+        loads: Callable[[bytes], Any] = None,
+    ):
+        self.local = local
+        self.shared = shared
+        self.dumps = dumps
+        self.loads = loads
+        self._flight = SingleFlight()
+        self._invalidations = 0
+        self.shared_hits = 0
+        self.loads_count = 0
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]]):
+        """Return the cached value for key, calling loader once on a miss."""
+        value = self.local.get(key)
+        if value is not None:
+            return value
+
+        invalidations = self._invalidations
+        return await self._flight.do(
+            key, lambda: self._load(key, loader, invalidations)
+        )
+
+    async def _load(self, key, loader, invalidations):
+        if self.shared is not None:
+            raw = await self.shared.get(key)
+            if raw is not None:
+                self.shared_hits += 1
+                value = self.loads(raw)
+                self.local.set(key, value)
+                return value
+
+        self.loads_count += 1
+        value = await loader()
+        if value is not None and invalidations == self._invalidations:
+            self.local.set(key, value)
+            if self.shared is not None:
+                await self.shared.set(key, self.dumps(value))
+        return value
+
+    async def invalidate(self, *keys: str) -> None:
+        """Drop keys from every tier; call after the write has committed."""
+        self._invalidations += 1
+        for key in keys:
+            self.local.delete(key)
+            if self.shared is not None:
+                await self.shared.delete(key)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self.local),
+            "local_hits": self.local.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.loads_count,
+            "coalesced": self._flight.coalesced,
+        }
@@ -0,0 +1,67 @@
+import json
+import zlib
+from difflib import SequenceMatcher, unified_diff
+from typing import Optional
+
+
+def compress_text(text: str) -> bytes:
+    return zlib.compress(text.encode(), 6)
+
+
+def decompress_text(data: bytes) -> str:
+    return zlib.decompress(data).decode()
+
+
+def make_delta(base: str, target: str) -> bytes:
+    """Compressed line delta turning base into target.
+
+    The delta is a list of ops: [i, j] copies base lines i..j, and a string
+    inserts new text.
+    """
+    base_lines = base.splitlines(keepends=True)
+    target_lines = target.splitlines(keepends=True)
+    ops = []
+    matcher = SequenceMatcher(None, base_lines, target_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append([i1, i2])
+        elif j2 > j1:
+            ops.append("".join(target_lines[j1:j2]))
+    return compress_text(json.dumps(ops, separators=(",", ":")))
+
+
+def apply_delta(base: str, delta: bytes) -> str:
+    base_lines = base.splitlines(keepends=True)
+    parts = []
+    for op in json.loads(decompress_text(delta)):
+        if isinstance(op, str):
+            parts.append(op)
+        else:
+            parts.extend(base_lines[op[0] : op[1]])
+    return "".join(parts)
+
+
+def delta_base(revision: int, snapshot_interval: int) -> Optional[int]:
+    """Revision that revision's delta is taken against, or None for a snapshot.
+
+    Revisions are numbered from 1 and every snapshot_interval-th one is a full
+    snapshot. In between, skip-deltas are used: offset k from the snapshot is
+    stored against offset k with its lowest set bit cleared. Rebuilding any
+    revision therefore applies at most log2(snapshot_interval) deltas.
+    """
+    offset = (revision - 1) % snapshot_interval
+    if offset == 0:
+        return None
+    return revision - offset + (offset & (offset - 1))
+
+
+def text_diff(old: str, new: str, old_label: str, new_label: str) -> str:
+    """Unified diff between two texts."""
+    return "".join(
+        unified_diff(
+            old.splitlines(keepends=True),
+            new.splitlines(keepends=True),
+            fromfile=old_label,
+            tofile=new_label,
+        )
+    )
@@ -0,0 +1,220 @@
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+from typing import Dict, Iterator, Optional, Tuple
+
+from sqlalchemy import event
+
+from .. import settings
+
+# Upper bounds in seconds, Prometheus' default buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Cumulative-bucket histogram rendered in the Prometheus text format."""
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...], buckets=None):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(buckets or DEFAULT_BUCKETS)
+        # label values -> (per-bucket counts incl. +Inf, sum)
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [
+                    [0] * (len(self.buckets) + 1),
+                    0.0,
+                ]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {
+                key: (list(counts), total)
+                for key, (counts, total) in self._series.items()
+            }
+        for label_values, (counts, total) in sorted(series.items()):
+            labels = ",".join(
+                f'{name}="{value}"' for name, value in zip(self.labels, label_values)
+            )
+            prefix = f"{labels}," if labels else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{self.name}_bucket{{{prefix}le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total}")
+            lines.append(f"{self.name}_count{{{labels}}} {cumulative}")
+        return "\n".join(lines)
+
+
+request_duration = Histogram(
+    "http_request_duration_seconds",
+    "Time spent handling HTTP requests.",
+    ("method", "route", "status"),
+)
+phase_duration = Histogram(
+    "request_phase_duration_seconds",
+    "Time spent per request in each phase (db, permit, hash, serialize).",
+    ("phase", "route"),
+)
+db_statements = Histogram(
+    "request_db_statements",
+    "SQL statements issued per request.",
+    ("route",),
+    buckets=(1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+)
+
+
+class RequestTimings:
+    """Time and call count per phase for the request being handled."""
+
+    __slots__ = ("phases",)
+
+    def __init__(self):
+        self.phases: Dict[str, list] = {}
+
+    def add(self, phase: str, seconds: float) -> None:
+        entry = self.phases.get(phase)
+        if entry is None:
+            self.phases[phase] = [seconds, 1]
+        else:
+            entry[0] += seconds
+            entry[1] += 1
+
+    def server_timing(self, total: float) -> str:
+        parts = [
+            f'{phase};dur={seconds * 1000:.2f};desc="{count} calls"'
+            for phase, (seconds, count) in self.phases.items()
+        ]
+        parts.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(parts)
+
+
+current_timings: ContextVar[Optional[RequestTimings]] = ContextVar(
+    "current_timings", default=None
+)
+
+
+def record(phase: str, seconds: float) -> None:
+    """Attribute seconds to phase in the current request, if there is one."""
+    timings = current_timings.get()
+    if timings is not None:
+        timings.add(phase, seconds)
+
+
+@contextmanager
+def span(phase: str) -> Iterator[None]:
+    """Time the enclosed block (awaits included) as part of phase."""
+    if current_timings.get() is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(phase, time.perf_counter() - start)
+
+
+def instrument_engine(engine) -> None:
+    """Time every SQL statement executed through a (sync) Engine."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, many):
+        record("db", time.perf_counter() - conn.info["query_start"].pop())
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        starts = (
+            context.connection.info.get("query_start") if context.connection else None
+        )
+        if starts:
+            record("db", time.perf_counter() - starts.pop())
+
+
+class InstrumentationMiddleware:
+    """Pure ASGI middleware collecting per-request phase timings.
+
+    Adds a Server-Timing header to every response and feeds the Prometheus
+    histograms served at /metrics.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._routes: Dict[object, str] = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if settings.server_timing_header:
+                    header = timings.server_timing(time.perf_counter() - start)
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"server-timing", header.encode())
+                    ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_timings.reset(token)
+            route = self._route_template(scope)
+            request_duration.observe(
+                time.perf_counter() - start, scope["method"], route, str(status_code)
+            )
+            for phase, (seconds, count) in timings.phases.items():
+                phase_duration.observe(seconds, phase, route)
+            db_statements.observe(timings.phases.get("db", (0, 0))[1], route)
+
+    def _route_template(self, scope) -> str:
+        # Label by route template, not raw path, to keep cardinality bounded
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        template = self._routes.get(endpoint)
+        if template is None:
+            template = next(
+                (
+                    route.path
+                    for route in scope["app"].routes
+                    if getattr(route, "endpoint", None) is endpoint
+                ),
+                endpoint.__name__,
+            )
+            self._routes[endpoint] = template
+        return template
+
+
+def render_metrics() -> str:
+    return (
+        "\n".join(
+            histogram.render()
+            for histogram in (request_duration, phase_duration, db_statements)
+        )
+        + "\n"
+    )
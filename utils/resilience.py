@@ -0,0 +1,103 @@
+import asyncio
+import random
+import time
+from typing import Any, Awaitable, Callable, Tuple, Type
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit is open."""
+
+
+class CircuitBreaker:
+    """Stops calling a failing dependency for a while.
+
+    After failure_threshold consecutive failures the circuit opens and calls
+    fail immediately with CircuitOpenError. Once reset_timeout has passed a
+    single trial call is let through (half-open); its outcome closes or
+    re-opens the circuit.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+
+    def _before_call(self) -> None:
+        if self.state == self.CLOSED:
+            return
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                raise CircuitOpenError(f"Circuit '{self.name}' is open")
+            self.state = self.HALF_OPEN
+            return
+        # Half-open: a trial call is already in flight
+        raise CircuitOpenError(f"Circuit '{self.name}' is half-open")
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    async def call(
+        self,
+        fn: Callable[[], Awaitable[Any]],
+        is_failure: Callable[[BaseException], bool],
+    ) -> Any:
+        self._before_call()
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            # A cancelled trial must not leave the circuit half-open forever
+            if self.state == self.HALF_OPEN:
+                self.record_failure()
+            raise
+        except Exception as ex:
+            if is_failure(ex):
+                self.record_failure()
+            elif self.state == self.HALF_OPEN:
+                self.record_success()
+            raise
+        self.record_success()
+        return result
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(cap, base * 2**attempt))
+
+
+async def call_with_retries(
+    fn: Callable[[], Awaitable[Any]],
+    *,
+    breaker: CircuitBreaker,
+    timeout: float,
+    retries: int,
+    backoff_base: float,
+    backoff_cap: float,
+    transient: Tuple[Type[BaseException], ...],
+    is_failure: Callable[[BaseException], bool],
+) -> Any:
+    """Call fn under a per-attempt deadline and a circuit breaker.
+
+    Failures matching is_failure are retried up to retries times with
+    jittered backoff; pass retries=0 for calls that are not idempotent.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return await breaker.call(
+                lambda: asyncio.wait_for(fn(), timeout=timeout), is_failure
+            )
+        except transient as ex:
+            if not is_failure(ex) or attempt == retries:
+                raise
+            await asyncio.sleep(backoff_delay(attempt, backoff_base, backoff_cap))
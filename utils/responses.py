@@ -0,0 +1,19 @@
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic_core import to_json
+
+from .instrumentation import span
+
+
+class PydanticJSONResponse(JSONResponse):
+    """JSONResponse that encodes content with pydantic-core.
+
+    Pydantic models, UUIDs, datetimes and enums inside the content are
+    serialized straight to bytes in a single pass, so handlers can pass
+    validated schemas through without dumping them to dicts first.
+    """
+
+    def render(self, content: Any) -> bytes:
+        with span("serialize"):
+            return to_json(content)
@@ -0,0 +1,121 @@
+import heapq
+from datetime import datetime
+from threading import Lock
+from typing import Dict, List, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+
+from ..models import RevokedTokens
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # pragma: no cover - optional dependency
+    redis = None
+
+
+class RevocationStore:
+    """Interface for token revocation backends.
+
+    Revocations are keyed by the JWT ``jti`` and only need to be kept until
+    the token's own ``exp``; after that the token is rejected anyway.
+    """
+
+    async def revoke(self, jti: str, expires_at: datetime) -> None:
+        raise NotImplementedError
+
+    async def is_revoked(self, jti: str) -> bool:
+        raise NotImplementedError
+
+
+class InMemoryRevocationStore(RevocationStore):
+    """Process-local store; only suitable for a single worker."""
+
+    def __init__(self):
+        self._revoked: Dict[str, datetime] = {}
+        self._expiry_heap: List[Tuple[datetime, str]] = []
+        self._lock = Lock()
+
+    def _purge_expired(self, now: datetime) -> None:
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            expires_at, jti = heapq.heappop(self._expiry_heap)
+            if self._revoked.get(jti) == expires_at:
+                del self._revoked[jti]
+
+    async def revoke(self, jti: str, expires_at: datetime) -> None:
+        with self._lock:
+            self._purge_expired(datetime.utcnow())
+            self._revoked[jti] = expires_at
+            heapq.heappush(self._expiry_heap, (expires_at, jti))
+
+    async def is_revoked(self, jti: str) -> bool:
+        expires_at = self._revoked.get(jti)
+        return expires_at is not None and expires_at > datetime.utcnow()
+
+
+class SQLRevocationStore(RevocationStore):
+    """Store revocations in the revoked_tokens table, shared by all workers."""
+
+    def __init__(self, session_factory):
+        self.session_factory = session_factory
+
+    async def revoke(self, jti: str, expires_at: datetime) -> None:
+        async with self.session_factory() as db:
+            await db.execute(
+                insert(RevokedTokens)
+                .values(jti=jti, expires_at=expires_at)
+                .on_conflict_do_nothing(index_elements=["jti"])
+            )
+            # Piggyback cleanup of expired rows on writes, which are rare
+            await db.execute(
+                delete(RevokedTokens).where(
+                    RevokedTokens.expires_at <= datetime.utcnow()
+                )
+            )
+            await db.commit()
+
+    async def is_revoked(self, jti: str) -> bool:
+        async with self.session_factory() as db:
+            found = await db.scalar(
+                select(RevokedTokens.id).where(
+                    RevokedTokens.jti == jti,
+                    RevokedTokens.expires_at > datetime.utcnow(),
+                )
+            )
+            return found is not None
+
+
+class RedisRevocationStore(RevocationStore):
+    """Store revocations in Redis (or any server speaking its protocol)."""
+
+    key_prefix = "revoked:"
+
+    def __init__(self, url: str):
+        if redis is None:
+            raise RuntimeError(
+                "The redis revocation backend requires the 'redis' package."
+            )
+        self.client = redis.from_url(url)
+
+    async def revoke(self, jti: str, expires_at: datetime) -> None:
+        ttl = int((expires_at - datetime.utcnow()).total_seconds())
+        if ttl > 0:
+            await self.client.set(self.key_prefix + jti, 1, ex=ttl)
+
+    async def is_revoked(self, jti: str) -> bool:
+        return bool(await self.client.exists(self.key_prefix + jti))
+
+
+def build_revocation_store(backend: str, redis_url: str = None) -> RevocationStore:
+    """Create the revocation backend selected in settings."""
+    if backend == "memory":
+        return InMemoryRevocationStore()
+    if backend == "sql":
+        from ..database import SessionLocal
+
+        return SQLRevocationStore(SessionLocal)
+    if backend == "redis":
+        if not redis_url:
+            raise RuntimeError("REDIS_URL must be set for the redis backend.")
+        return RedisRevocationStore(redis_url)
+    raise RuntimeError(f"Unknown token revocation backend '{backend}'.")
@@ -1,9 +1,16 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+
 from ..database import SessionLocal
 
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+
+async def release_connection(db: AsyncSession) -> None:
+    """Hand the session's connection back to the pool before a slow non-DB
+    await. Only read-only transactions are ended; the session reconnects on
+    its next query and loaded objects stay usable (expire_on_commit=False)."""
+    if db.in_transaction() and not (db.new or db.dirty or db.deleted):
+        await db.commit()
@@ -0,0 +1,19 @@
+import zlib
+from typing import Any, AsyncIterable, AsyncIterator, Iterable
+
+from pydantic_core import to_json
+
+
+def ndjson_chunk(rows: Iterable[Any]) -> bytes:
+    """Encode rows (dicts or pydantic models) as newline-delimited JSON."""
+    return b"".join(to_json(row) + b"\n" for row in rows)
+
+
+async def gzip_stream(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    """Incrementally gzip-compress a stream of byte chunks."""
+    compressor = zlib.compressobj(wbits=31)  # 31 -> gzip container
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()